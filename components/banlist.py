@@ -5,11 +5,11 @@ import alluka
 import hikari
 import tanjun
 
-from utils import trigger_typing
+from utils import ResourceLocks, trigger_typing
 from utils.checks.role_checks import mod_check
 from utils.config import Config, ConfigHandler
 from utils.converters import PlayerInfo, to_player_info
-from utils.database import BannedMemberInfo, DBConnection, convert_to_banned
+from utils.database import BannedMemberInfo, DBConnection, WriteBatcher, convert_to_banned
 
 ################
 #   Commands   #
@@ -42,7 +42,6 @@ async def help(ctx: tanjun.abc.MessageContext, config: Config = alluka.inject(ty
     await ctx.respond(embed=help_embed)
 
 
-@tanjun.with_concurrency_limit("database_commands", follow_wrapped=True)
 @tanjun.annotations.with_annotated_args(follow_wrapped=True)
 @tanjun.with_check(mod_check, follow_wrapped=True)
 # prefix options
@@ -56,53 +55,40 @@ async def help(ctx: tanjun.abc.MessageContext, config: Config = alluka.inject(ty
 async def add(ctx: tanjun.abc.Context,
               player_info: PlayerInfo,
               reason: str,
-              config: Config = alluka.inject(type=Config),
-              db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
+              config: Config = alluka.inject(type=Config)):
     await trigger_typing(ctx)
 
-    cursor: aiosqlite.Cursor = await db.cursor()
+    async with ResourceLocks().hold(('banned', player_info['uuid'])):
+        # Check if user is already banned
+        if await fetch_user_from_db(player_info['uuid']) is not None:
+            embed = hikari.Embed(
+                title="Operation Canceled",
+                description="User is already banned",
+                color=config['colors']['secondary']
+            )
+            await ctx.respond(embed=embed)
+            return
 
-    # Check if user is already banned
-    await cursor.execute('''
-        SELECT *
-        FROM "BANNED"
-        WHERE uuid=:uuid
-    ''', {
-        "uuid": player_info['uuid']
-    })
-
-    if await cursor.fetchone() is not None:
         embed = hikari.Embed(
-            title="Operation Canceled",
-            description="User is already banned",
-            color=config['colors']['secondary']
+            title="Success",
+            description=f"User `{player_info['ign']}` added to the ban list",
+            color=config['colors']['success']
         )
-        await ctx.respond(embed=embed)
-        return
 
-    embed = hikari.Embed(
-        title="Success",
-        description=f"User `{player_info['ign']}` added to the ban list",
-        color=config['colors']['success']
-    )
-
-    # Save banned member to database
-    await cursor.execute('''
-        INSERT INTO "BANNED"(uuid, reason ,moderator, created_at)
-        VALUES (:uuid, :reason, :moderator, :created_at)
-    ''', {
-        "uuid": player_info['uuid'],
-        "reason": reason,
-        "moderator": ctx.author.id,
-        "created_at": int(time.time())
-    })
+        # Save banned member to database
+        await WriteBatcher().execute('''
+            INSERT INTO "BANNED"(uuid, reason ,moderator, created_at)
+            VALUES (:uuid, :reason, :moderator, :created_at)
+        ''', {
+            "uuid": player_info['uuid'],
+            "reason": reason,
+            "moderator": ctx.author.id,
+            "created_at": int(time.time())
+        })
 
     await ctx.respond(embed=embed)
-    await cursor.close()
-    await db.commit()
 
 
-@tanjun.with_concurrency_limit("database_commands", follow_wrapped=True)
 @tanjun.with_argument("player_info", converters=to_player_info)
 @bl_msg_group.as_sub_command("check", "c")
 @tanjun.with_str_slash_option("ign", "User's IGN", key='player_info', converters=to_player_info)
@@ -135,47 +121,44 @@ async def check(ctx: tanjun.abc.Context, player_info: PlayerInfo,
     await ctx.respond(embed=embed)
 
 
-@tanjun.with_concurrency_limit("database_commands", follow_wrapped=True)
 @tanjun.with_check(mod_check, follow_wrapped=True)
 @tanjun.with_argument("player_info", converters=to_player_info)
 @bl_msg_group.as_sub_command("remove", "r", "rm", "delete", "del")
 @tanjun.with_str_slash_option("banned_ign", "User's IGN", key='player_info', converters=to_player_info)
 @bl_slash_group.as_sub_command("remove", "Remove a user from our ban list")
 async def remove(ctx: tanjun.abc.Context, player_info: PlayerInfo,
-                 config: Config = alluka.inject(type=Config),
-                 db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
+                 config: Config = alluka.inject(type=Config)):
     await trigger_typing(ctx)
 
-    banned = await fetch_user_from_db(player_info['uuid'])
+    async with ResourceLocks().hold(('banned', player_info['uuid'])):
+        banned = await fetch_user_from_db(player_info['uuid'])
+
+        if banned is None:
+            embed = hikari.Embed(
+                title="Error",
+                description="User is not present in our database",
+                color=config['colors']['error']
+            )
+            await ctx.respond(embed=embed)
+            return
+
+        await WriteBatcher().execute('''
+            DELETE
+            FROM "BANNED"
+            WHERE uuid=:uuid
+        ''', {
+            "uuid": player_info['uuid']
+        })
 
-    if banned is None:
         embed = hikari.Embed(
-            title="Error",
-            description="User is not present in our database",
-            color=config['colors']['error']
+            title="Success",
+            description=f"User `{player_info['ign']}` was removed from the ban list",
+            color=config['colors']['success']
         )
-        await ctx.respond(embed=embed)
-        return
-
-    await db.execute('''
-        DELETE
-        FROM "BANNED"
-        WHERE uuid=:uuid
-    ''', {
-        "uuid": player_info['uuid']
-    })
-
-    embed = hikari.Embed(
-        title="Success",
-        description=f"User `{player_info['ign']}` was removed from the ban list",
-        color=config['colors']['success']
-    )
 
-    await db.commit()
     await ctx.respond(embed=embed)
 
 
-@tanjun.with_concurrency_limit("database_commands", follow_wrapped=True)
 @tanjun.annotations.with_annotated_args(follow_wrapped=True)
 @tanjun.with_argument("player_info", converters=to_player_info)
 @bl_msg_group.as_sub_command("info", "i")
@@ -215,17 +198,16 @@ async def info(ctx: tanjun.abc.Context, player_info: PlayerInfo,
 
 
 async def fetch_user_from_db(uuid: str) -> BannedMemberInfo | None:
-    cursor: aiosqlite.Cursor = await DBConnection().get_db().cursor()
-
-    await cursor.execute('''
-        SELECT *
-        FROM "BANNED"
-        WHERE uuid=:uuid
-    ''', {
-        "uuid": uuid
-    })
-    res = await cursor.fetchone()
-    await cursor.close()
+    cursor: aiosqlite.Cursor
+    async with DBConnection().get_read_pool().acquire() as db, db.cursor() as cursor:
+        await cursor.execute('''
+            SELECT *
+            FROM "BANNED"
+            WHERE uuid=:uuid
+        ''', {
+            "uuid": uuid
+        })
+        res = await cursor.fetchone()
 
     if res is None:
         return None
@@ -1,29 +1,28 @@
 import asyncio
-import os
 import time
+from math import ceil
 from typing import Annotated
 
-import aiohttp
-import aiosqlite
 import alluka
 import hikari
 import miru
 import tanjun
 
-from utils import get, trigger_typing
+from utils import ResourceLocks, request, trigger_typing
 from utils.checks.db_checks import registered_check
 from utils.checks.role_checks import jr_mod_check
 from utils.config import ConfigHandler
 from utils.converters import PlayerInfo, to_player_info, to_timestamp
-from utils.database import UserInfo, convert_to_user
+from utils.database import ReadPool, UserInfo, WriteBatcher, convert_to_user
 from utils.error_utils import log_error
+from utils.hypixel import GuildSnapshots, HypixelAPIError, build_report, load_report, save_report
+from utils.pagination import PAGE_SIZE, KeysetPages, LazyNavigatorView
 
 ################
 #    Config    #
 ################
 
 config = ConfigHandler().get_config()
-api_key = os.getenv("APIKEY")
 
 guild_choices = Annotated[tanjun.annotations.Str, "Guild name", tanjun.annotations.Choices(
     list(map(lambda s: s.lower(), list(config['guilds'].keys()))))]
@@ -66,15 +65,14 @@ class InactiveKickButton(miru.Button):
 
         await ctx.get_channel().trigger_typing()
 
-        async with aiohttp.ClientSession(trust_env=True) as session:
-            # Hack to avoid the blank string :P
-            for ign in self.player_list.split('\n')[1:][-1:-6:-1]:
-                await session.post(
-                    url=self.endpoint + 'kick',
-                    headers={'Content-Type': 'application/json'},
-                    json={'username': ign, 'reason': 'Inactivity kick. Join back.'}
-                )
-                await asyncio.sleep(1)
+        # Hack to avoid the blank string :P
+        for ign in self.player_list.split('\n')[1:][-1:-6:-1]:
+            await request(
+                'POST', self.endpoint + 'kick',
+                headers={'Content-Type': 'application/json'},
+                json={'username': ign, 'reason': 'Inactivity kick. Join back.'}
+            )
+            await asyncio.sleep(1)
 
         await ctx.get_channel().send("Successfully kicked 5 guild members")
 
@@ -96,96 +94,65 @@ component.add_slash_command(inactive_group)
 @tanjun.with_cooldown("api_commands")
 @tanjun.with_check(jr_mod_check)
 @tanjun.annotations.with_annotated_args()
-@tanjun.with_concurrency_limit("database_commands")
 @inactive_group.as_sub_command("check", "Checks for inactive players in a given guild")
 async def inactive_check(ctx: tanjun.abc.SlashContext, guild: guild_choices,
-                         db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
+                         refresh: Annotated[tanjun.annotations.Bool, "Ignore the latest report and check now"] = False):
     await trigger_typing(ctx)
 
-    session = aiohttp.ClientSession()
+    guild_uuid = config['guilds'][guild.upper()]['guild_uuid']
 
-    cursor: aiosqlite.Cursor
-    async with db.cursor() as cursor:
-        await cursor.execute('''
-            SELECT *
-            FROM "USERS"
-            WHERE inactive_until IS NOT null
-        ''')
+    # The stored report is read without the lock, so it's never held up by a rebuild in progress
+    stored = await load_report(guild_uuid)
+    report = None if refresh else stored
 
-        values = await cursor.fetchall()
-
-    inactives_uuids = [inactive[0] for inactive in values]
-
-    res = await session.get(f'https://api.hypixel.net/guild?key={api_key}&name={guild}')
-
-    if res.status != 200:
+    if report is None:
         embed = hikari.Embed(
-            title='Error',
-            description='Something went wrong.',
-            color=config['colors']['error']
+            title=f"Inactive List for {guild.upper()}",
+            description=f"Loading, please wait <a:loading:978732444998070304>",
+            color=config['colors']['secondary']
         )
-        embed.set_footer(f'Status code: {res.status}')
         await ctx.respond(embed=embed)
-        await session.close()
-        return
-
-    data = await res.json()
-
-    embed = hikari.Embed(
-        title=f"Inactive List for {data['guild']['name']}",
-        description=f"Loading, please wait <a:loading:978732444998070304>",
-        color=config['colors']['secondary']
-    )
-    await ctx.respond(embed=embed)
 
-    embed_body = ""  # List of inactive IGNs (or UUIDs if API error)
-    total_inactive = 0  # Sum of inactive players
-
-    for player in data["guild"]["members"]:  # for every member in the guild
-        # Check if they joined recently. This exists just to skip some unnecessary api calls for new members
-        if (time.time() - (player['joined'] / 1000) - 604800) < 0:
-            continue
-        if player["uuid"] in inactives_uuids:
-            continue
-
-        # if total exp is over the minimum or player uuid is in the inactives then go to next member
-        if sum(player["expHistory"].values()) > config['min_gexp']:
-            continue
-
-        try:  # Fetch player info from hypixel API
-            hypixel_res = await session.get(f"https://api.hypixel.net/player?key={api_key}&uuid={player['uuid']}")
-            # Ensure OK status
-            assert hypixel_res.status == 200, 'Hypixel did not return a 200'
-
-            hypixel_prof = await hypixel_res.json()
-            # Ensure player exists
-            assert hypixel_prof['player'] is not None, f'Player with UUID {player["uuid"]} not found'
-
-        except Exception as exception:  # If there is an exception, log it and add the uuid in the embed
-            await log_error(ctx, exception)
-            embed_body += f'\n{player["uuid"]}'
-
-        else:  # Else
-            # Continue if player has logged in the last 7 days
-            try:
-                if (hypixel_prof['player']['lastLogin'] / 1000) + 604800 > time.time():
-                    continue
-            except KeyError:
-                pass
-            except Exception as exception:
-                await log_error(ctx, exception)
-            # Add them to inactives if not
-            username = hypixel_prof['player']['displayname']
-            embed_body += f"\n{username}"
-
-        total_inactive += 1  # Increment the inactive total
-
-    await session.close()
+        async with ResourceLocks().hold(('inactive_report', guild_uuid)):
+            # A report saved while waiting for the lock is as fresh as one built now
+            latest = await load_report(guild_uuid)
+            if latest is not None and (stored is None or latest['created_at'] > stored['created_at']):
+                report = latest
+
+            if report is None:
+                async def show_progress(done: int, total: int) -> None:
+                    embed.description = f"Checked {done}/{total} members, please wait <a:loading:978732444998070304>"
+                    await ctx.edit_initial_response(embed=embed)
+
+                try:
+                    report, errors = await build_report(guild_uuid, show_progress)
+                except HypixelAPIError as exception:
+                    report, errors = None, [exception]
+
+                # If there is an exception, log it. The player's uuid is in the report instead of their IGN
+                for exception in errors:
+                    await log_error(ctx, exception)
+
+                if report is None:
+                    embed = hikari.Embed(
+                        title='Error',
+                        description='Something went wrong.',
+                        color=config['colors']['error']
+                    )
+                    if errors:
+                        embed.set_footer(f'Status code: {errors[0].status}')
+                    await ctx.edit_initial_response(embed=embed)
+                    return
+
+                await save_report(report)
+
+    embed_body = ''.join(f"\n{player}" for player in report['players'])  # List of inactive IGNs (or UUIDs)
 
     embed = hikari.Embed(
-        title=f"Inactive List for {data['guild']['name']}",
-        description=f"{total_inactive} members were found to be inactive."
-                    f"```{embed_body}```",
+        title=f"Inactive List for {report['guild_name']}",
+        description=f"{len(report['players'])} members were found to be inactive."
+                    f"```{embed_body}```"
+                    f"*Checked <t:{report['created_at']}:R>. Use `refresh` to check again now.*",
         color=config['colors']['primary']
     )
 
@@ -200,12 +167,10 @@ async def inactive_check(ctx: tanjun.abc.SlashContext, guild: guild_choices,
 
 
 @tanjun.with_check(registered_check)
-@tanjun.with_concurrency_limit("database_commands")
 @tanjun.with_str_slash_option('afk_time', 'Approximate afk time. Ex: 14d -> 14 days', converters=to_timestamp)
 @inactive_group.as_sub_command("add", "Adds you to the inactivity list")
 async def inactive_add(ctx: tanjun.abc.SlashContext,
-                       afk_time: int,
-                       db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
+                       afk_time: int):
     if afk_time < 604800 or afk_time > 2592000:
         embed = hikari.Embed(
             title='Error',
@@ -217,7 +182,7 @@ async def inactive_add(ctx: tanjun.abc.SlashContext,
 
     afk_time = int(afk_time + time.time())
 
-    await db.execute('''
+    await WriteBatcher().execute('''
         UPDATE "USERS"
         SET inactive_until=:afk_time
         WHERE discord_id=:discord_id
@@ -225,7 +190,6 @@ async def inactive_add(ctx: tanjun.abc.SlashContext,
         "afk_time": afk_time,
         "discord_id": ctx.author.id
     })
-    await db.commit()
 
     embed = hikari.Embed(
         title=f'Success',
@@ -239,38 +203,33 @@ async def inactive_add(ctx: tanjun.abc.SlashContext,
 @tanjun.with_check(jr_mod_check)
 @inactive_group.as_sub_command("list", "Lists all the users with an inactivity notice")
 async def inactive_list(ctx: tanjun.abc.SlashContext,
-                        db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
-    cursor: aiosqlite.Cursor
-    async with db.cursor() as cursor:
-        await cursor.execute('''
-            SELECT *
-            FROM "USERS"
-            WHERE inactive_until IS NOT NULL AND discord_id != 0
-        ''')
-        member_list = await cursor.fetchall()
-
-    embed_body = '**IGN** | **Username** | **Inactive until**\n'
-
-    for row in member_list:
-        member: UserInfo = convert_to_user(row)
-        mention = f"<@{member['discord_id']}>" if member['discord_id'] != 1 else '-'
-        embed_body += f"{member['ign']} | {mention} | " \
-                      f"<t:{member['inactive_until']}:D>\n"
-
-    if len(embed_body) > 2000:
-        attachment = hikari.Bytes(bytes(embed_body, encoding='utf-8'), 'inactives.txt')
-
-        await ctx.respond(attachment=attachment)
-        return
+                        read_pool: ReadPool = alluka.inject(type=ReadPool)):
+    inactives = KeysetPages(read_pool, '''
+        SELECT *
+        FROM "USERS"
+        WHERE inactive_until IS NOT NULL AND discord_id != 0
+    ''', {}, key='uuid')
+
+    async def build_page(page: int) -> hikari.Embed:
+        embed_body = '**IGN** | **Username** | **Inactive until**\n'
+
+        for row in await inactives.fetch(page):
+            member: UserInfo = convert_to_user(row)
+            mention = f"<@{member['discord_id']}>" if member['discord_id'] != 1 else '-'
+            embed_body += f"{member['ign']} | {mention} | " \
+                          f"<t:{member['inactive_until']}:D>\n"
+
+        return hikari.Embed(
+            title='Inactive List',
+            description=embed_body,
+            color=config['colors']['primary']
+        )
 
-    embed = hikari.Embed(
-        title='Inactive List',
-        description=embed_body,
-        color=config['colors']['primary']
-    )
+    # An empty list still shows the header
+    pages_num = max(ceil(await inactives.count() / PAGE_SIZE), 1)
 
-    await ctx.respond(embed=embed)
-    pass
+    navigator = LazyNavigatorView(page_count=pages_num, build_page=build_page, timeout=30)
+    await navigator.send(ctx.interaction)
 
 
 @tanjun.with_str_slash_option("afk_time", "Approximate afk time", converters=to_timestamp)
@@ -278,8 +237,7 @@ async def inactive_list(ctx: tanjun.abc.SlashContext,
 @inactive_force_group.as_sub_command("add", "Adds a user to the inactivity list")
 async def inactive_force_add(ctx: tanjun.abc.SlashContext,
                              player_info: PlayerInfo,
-                             afk_time: int,
-                             db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
+                             afk_time: int):
     if afk_time < 604800 or afk_time > 2592000:
         embed = hikari.Embed(
             title='Error',
@@ -291,51 +249,36 @@ async def inactive_force_add(ctx: tanjun.abc.SlashContext,
 
     afk_time = int(afk_time + time.time())
 
-    res = await get(f"https://api.hypixel.net/guild?player={player_info['uuid']}&key={api_key}")
-    data = await res.json()
+    status = 200
+    try:
+        snapshot = await GuildSnapshots().get_player_guild(player_info['uuid'])
+    except HypixelAPIError as exception:
+        status = exception.status
+        snapshot = None
 
-    if res.status != 200 or data['guild'] is None:
+    if snapshot is None:
         embed = hikari.Embed(
             title='Error',
             description='User either not found, or is not in a guild',
             color=config['colors']['error']
         )
-        embed.set_footer(f"Status code: {res.status} | Guild: {data['guild']}")
+        embed.set_footer(f"Status code: {status} | Guild: None")
 
         await ctx.respond(embed=embed)
         return
 
-    cursor: aiosqlite.Cursor
-    async with db.cursor() as cursor:
-        # Check if user is registered
-        await cursor.execute('''
-            SELECT COUNT(1)
-            FROM "USERS"
-            WHERE uuid=:uuid
-        ''', {"uuid": player_info['uuid']})
-        count = (await cursor.fetchone())[0]
-
-        if count == 0:  # If they are not then create new entry
-            print('a')
-            await cursor.execute('''
-                INSERT INTO "USERS"(uuid, discord_id, ign, created_at, inactive_until) 
-                VALUES (:uuid, :discord_id, :ign, :created_at, :inactive_until) 
-            ''', {
-                "uuid": player_info['uuid'],
-                "discord_id": 1,
-                "ign": player_info['ign'],
-                "created_at": int(time.time()),
-                "inactive_until": afk_time
-            })
-        else:  # If they are then update the inactive_until field
-            await cursor.execute('''
-                UPDATE "USERS"
-                SET inactive_until=:inactive_until
-                WHERE uuid=:uuid
-            ''', {
-                "uuid": player_info['uuid'],
-                "inactive_until": afk_time
-            })
+    # Create an entry if the user is not registered, otherwise update the inactive_until field
+    await WriteBatcher().execute('''
+        INSERT INTO "USERS"(uuid, discord_id, ign, created_at, inactive_until)
+        VALUES (:uuid, :discord_id, :ign, :created_at, :inactive_until)
+        ON CONFLICT(uuid) DO UPDATE SET inactive_until=excluded.inactive_until
+    ''', {
+        "uuid": player_info['uuid'],
+        "discord_id": 1,
+        "ign": player_info['ign'],
+        "created_at": int(time.time()),
+        "inactive_until": afk_time
+    })
 
     embed = hikari.Embed(
         title='Success',
@@ -343,15 +286,13 @@ async def inactive_force_add(ctx: tanjun.abc.SlashContext,
         color=config['colors']['success']
     )
 
-    await db.commit()
     await ctx.respond(embed=embed)
 
 
 @tanjun.with_str_slash_option("ign", "User's IGN", key="player_info", converters=to_player_info)
 @inactive_force_group.as_sub_command("remove", "Removes a user from the inactivity list")
-async def inactive_force_remove(ctx: tanjun.abc.SlashContext, player_info: PlayerInfo,
-                                db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
-    await db.execute('''
+async def inactive_force_remove(ctx: tanjun.abc.SlashContext, player_info: PlayerInfo):
+    await WriteBatcher().execute('''
         DELETE
         FROM "USERS"
         WHERE uuid=:uuid
@@ -363,7 +304,6 @@ async def inactive_force_remove(ctx: tanjun.abc.SlashContext, player_info: Playe
         color=config['colors']['success']
     )
 
-    await db.commit()
     await ctx.respond(embed=embed)
 
 
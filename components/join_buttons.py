@@ -4,6 +4,7 @@ import hikari
 import miru
 import tanjun
 
+from utils import request
 from utils.config import Config, ConfigHandler
 from utils.error_utils import log_error
 
@@ -13,19 +14,18 @@ from utils.error_utils import log_error
 #######################
 
 async def invite_member(ctx, endpoint, username):
-    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(connect=5)) as session:
-        try:
-            r = await session.post(
-                url=endpoint,
-                headers={'Content-Type': 'application/json'},
-                json={'username': username}
-            )
-            response = await r.json()
-            r.close()
-            return bool(response['success'])
-        except Exception as exception:
-            await log_error(ctx, exception)
-            return False
+    try:
+        r = await request(
+            'POST', endpoint,
+            headers={'Content-Type': 'application/json'},
+            json={'username': username},
+            timeout=aiohttp.ClientTimeout(connect=5)
+        )
+        response = await r.json()
+        return bool(response['success'])
+    except Exception as exception:
+        await log_error(ctx, exception)
+        return False
 
 
 class JoinModal(miru.Modal):
@@ -1,10 +1,9 @@
 from typing import Annotated, Literal
 
-import aiohttp
 import hikari
 import tanjun
 
-from utils import profile_choices, trigger_typing
+from utils import get, profile_choices, trigger_typing
 from utils.config import Config, ConfigHandler
 
 ################
@@ -19,27 +18,22 @@ async def check_req_routine(ctx: tanjun.abc.Context, ign: str, cute_name, is_jr:
     config = ConfigHandler().get_config()
     await trigger_typing(ctx)
 
-    session = aiohttp.ClientSession()
+    await get(f"https://sky.shiiyu.moe/stats/{ign}")
 
-    (await session.get(f"https://sky.shiiyu.moe/stats/{ign}")).close()
-
-    async with session.get(f"https://sky.shiiyu.moe/api/v2/profile/{ign}") as res:
-        if res.status != 200:
-            embed = hikari.Embed(
-                title='Error',
-                description=f'User with IGN `{ign}` not found.\n'
-                            f'If `{ign}` is a valid IGN then it\'s an API error.\n'
-                            f'Please check manually.',
-                color=config['colors']['error']
-            )
-            embed.set_footer(f"Status code: {res.status}")
-            await ctx.respond(embed=embed)
-            await session.close()
-            return
-
-        profiles = await res.json()
+    res = await get(f"https://sky.shiiyu.moe/api/v2/profile/{ign}")
+    if res.status != 200:
+        embed = hikari.Embed(
+            title='Error',
+            description=f'User with IGN `{ign}` not found.\n'
+                        f'If `{ign}` is a valid IGN then it\'s an API error.\n'
+                        f'Please check manually.',
+            color=config['colors']['error']
+        )
+        embed.set_footer(f"Status code: {res.status}")
+        await ctx.respond(embed=embed)
+        return
 
-    await session.close()
+    profiles = await res.json()
 
     weight = 0  # used to store the weight but also find the biggest weight in the profiles
 
@@ -1,11 +1,12 @@
 from io import BytesIO
 
-import aiohttp
 import hikari
 import tanjun
 from petpetgif import petpet
 
+from utils import UUIDCache, get
 from utils.checks.role_checks import active_check
+from utils.config import Config
 
 
 ################
@@ -20,9 +21,8 @@ async def pat(ctx: tanjun.abc.MessageContext, user: hikari.User = None):
     if user is None:
         user = ctx.author
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(user.display_avatar_url.url) as res:
-            content = await res.content.read()
+    res = await get(user.display_avatar_url.url)
+    content = await res.read()
 
     source = BytesIO(content)
     dest = BytesIO()
@@ -33,5 +33,25 @@ async def pat(ctx: tanjun.abc.MessageContext, user: hikari.User = None):
     await ctx.respond(attachment=hikari.Bytes(dest, f'{ctx.author.username}-petpet.gif'))
 
 
+@tanjun.as_slash_command('cache_stats', 'Shows the IGN to UUID cache statistics',
+                         default_member_permissions=hikari.Permissions.ADMINISTRATOR, default_to_ephemeral=True)
+async def cache_stats(ctx: tanjun.abc.SlashContext, config: Config = tanjun.inject(type=Config)):
+    stats = UUIDCache().stats()
+    lookups = stats['hits'] + stats['db_hits'] + stats['misses']
+
+    embed = hikari.Embed(
+        title='UUID Cache',
+        color=config['colors']['primary']
+    )
+    embed.add_field(name='Cached IGNs', value=str(stats['size']))
+    embed.add_field(name='Memory hits', value=str(stats['hits']))
+    embed.add_field(name='Database hits', value=str(stats['db_hits']))
+    embed.add_field(name='Misses', value=str(stats['misses']))
+    embed.add_field(name='Hit rate',
+                    value=f"{(stats['hits'] + stats['db_hits']) / lookups:.1%}" if lookups else '-')
+
+    await ctx.respond(embed=embed)
+
+
 component = tanjun.Component().load_from_scope()
 loader = component.make_loader()
@@ -4,25 +4,28 @@ from math import ceil
 import alluka
 import hikari
 import tanjun
-from aiosqlite import Connection, Cursor
-from miru.ext import nav
+from aiosqlite import Cursor
 
 from utils.checks.role_checks import jr_admin_check
 from utils.config import Config
-from utils.database import convert_to_rep
+from utils.database import ReadPool, WriteBatcher, convert_to_rep, next_id
 from utils.error_utils import log_error
+from utils.pagination import PAGE_SIZE, KeysetPages, LazyNavigatorView
+
+LEADERBOARD_SIZE = 25  # Receivers shown on the leaderboard
 
 
 ####################
 #  Misc Functions  #
 ####################
 
-async def award_rep_role(receiver: hikari.Member, config: Config, db: Connection):
+async def award_rep_role(receiver: hikari.Member, config: Config, read_pool: ReadPool):
     cursor: Cursor
-    async with db.cursor() as cursor:
+    async with read_pool.acquire() as db, db.cursor() as cursor:
+        # Reps of every type count towards the awards
         await cursor.execute('''
-            SELECT COUNT(0)
-            FROM "REPUTATION"
+            SELECT COALESCE(SUM(count), 0)
+            FROM "REP_COUNTS"
             WHERE receiver=:receiver
         ''', {"receiver": receiver.id})
 
@@ -71,7 +74,7 @@ component.add_slash_command(rep_slash_group)
 @tanjun.with_user_slash_option("receiver", "The user to give rep to")
 @rep_slash_group.as_sub_command("give", "Give reputation to a user", always_defer=True, default_to_ephemeral=True)
 async def rep_give(ctx: tanjun.abc.SlashContext, receiver: hikari.Member, comments: str,
-                   config: Config = tanjun.inject(), db: Connection = tanjun.inject()):
+                   config: Config = tanjun.inject(), read_pool: ReadPool = tanjun.inject(type=ReadPool)):
     craft_ch = config['rep']['craft_rep_channel_id']
     carry_ch = config['rep']['carry_rep_channel_id']
 
@@ -97,14 +100,7 @@ async def rep_give(ctx: tanjun.abc.SlashContext, receiver: hikari.Member, commen
         await ctx.respond(embed=embed)
         return
 
-    cursor: Cursor
-    async with db.cursor() as cursor:
-        # Fetch new rep ID
-        await cursor.execute('''
-            SELECT max(rep_id)
-            FROM "REPUTATION"
-        ''')
-        rep_id = (await cursor.fetchone())[0] + 1
+    rep_id = await next_id('rep_id')
 
     rep_type = 0 if ctx.channel_id == craft_ch else 1
     rep_embed = hikari.Embed(
@@ -120,7 +116,7 @@ async def rep_give(ctx: tanjun.abc.SlashContext, receiver: hikari.Member, commen
 
     msg = await ctx.get_channel().send(embed=rep_embed)
 
-    await db.execute('''
+    await WriteBatcher().execute('''
         INSERT INTO "REPUTATION"
         VALUES (:rep_id, :receiver, :provider, :comments, :created_at, :msg_id, :type)
     ''', {
@@ -132,7 +128,6 @@ async def rep_give(ctx: tanjun.abc.SlashContext, receiver: hikari.Member, commen
         "type": rep_type,
         "msg_id": msg.id
     })
-    await db.commit()
 
     embed = hikari.Embed(
         title="Success",
@@ -142,7 +137,7 @@ async def rep_give(ctx: tanjun.abc.SlashContext, receiver: hikari.Member, commen
 
     await ctx.respond(embed=embed)
 
-    await award_rep_role(receiver, config, db)
+    await award_rep_role(receiver, config, read_pool)
 
 
 @tanjun.with_check(jr_admin_check)
@@ -150,10 +145,10 @@ async def rep_give(ctx: tanjun.abc.SlashContext, receiver: hikari.Member, commen
 @rep_slash_group.as_sub_command("remove", "Removes a rep from the database", always_defer=True,
                                 default_to_ephemeral=True)
 async def rep_remove(ctx: tanjun.abc.SlashContext, rep_id: int,
-                     config: Config = tanjun.inject(), db: Connection = tanjun.inject()):
+                     config: Config = tanjun.inject(), read_pool: ReadPool = tanjun.inject(type=ReadPool)):
     cursor: Cursor
     # Ensure that rep with given ID exists
-    async with await db.cursor() as cursor:
+    async with read_pool.acquire() as db, db.cursor() as cursor:
         await cursor.execute('''
             SELECT COUNT(1), msg_id, type
             FROM "REPUTATION"
@@ -171,12 +166,11 @@ async def rep_remove(ctx: tanjun.abc.SlashContext, rep_id: int,
         await ctx.respond(embed=embed)
         return
 
-    await db.execute('''
+    await WriteBatcher().execute('''
         DELETE
         FROM "REPUTATION"
         WHERE rep_id=:rep_id
     ''', {"rep_id": rep_id})
-    await db.commit()
 
     channel_id = config['rep']['craft_rep_channel_id'] if data[2] == 0 else config['rep']['carry_rep_channel_id']
     channel = ctx.get_guild().get_channel(channel_id)
@@ -209,22 +203,23 @@ async def rep_remove(ctx: tanjun.abc.SlashContext, rep_id: int,
 @rep_slash_group.as_sub_command("list", "Lists the reps a user has received", always_defer=True)
 async def rep_list(ctx: tanjun.abc.SlashContext, carrier: hikari.User, crafter: hikari.User,
                    config: Config = alluka.inject(type=Config),
-                   db: Connection = alluka.inject(type=Connection)):
+                   read_pool: ReadPool = alluka.inject(type=ReadPool)):
     user = carrier if carrier is not None else crafter
     rep_type = 0 if crafter is not None else 1
 
-    cursor: Cursor = await db.cursor()
-    await cursor.execute('''
-        SELECT *
-        FROM "REPUTATION"
-        WHERE receiver=:receiver_id AND type=:type
-    ''', {
-        "receiver_id": user.id,
-        "type": rep_type
-    })
-    data = await cursor.fetchall()
-
-    if (rep_num := len(list(data))) == 0:
+    cursor: Cursor
+    async with read_pool.acquire() as db, db.cursor() as cursor:
+        await cursor.execute('''
+            SELECT count
+            FROM "REP_COUNTS"
+            WHERE receiver=:receiver_id AND type=:type
+        ''', {
+            "receiver_id": user.id,
+            "type": rep_type
+        })
+        res = await cursor.fetchone()
+
+    if (rep_num := res[0] if res else 0) == 0:
         embed = hikari.Embed(
             description=f"User has not received any {'carry' if rep_type else 'craft'} reps.",
             color=config['colors']['primary']
@@ -232,14 +227,21 @@ async def rep_list(ctx: tanjun.abc.SlashContext, carrier: hikari.User, crafter:
         await ctx.respond(embed=embed)
         return
 
-    pages = []
-    max_page = ceil(rep_num / 10)
-    for page in range(1, max_page + 1):
+    reps = KeysetPages(read_pool, '''
+        SELECT *
+        FROM "REPUTATION"
+        WHERE receiver=:receiver_id AND type=:type
+    ''', {
+        "receiver_id": user.id,
+        "type": rep_type
+    }, key='rep_id')
+
+    async def build_page(page: int) -> hikari.Embed:
         embed = hikari.Embed(
             title=f"{'Carry' if rep_type else 'Craft'} Reps",
             color=config['colors']['primary']
         )
-        for rep in data[(page - 1) * 10:page * 10]:
+        for rep in await reps.fetch(page):
             rep = convert_to_rep(rep)
 
             embed.add_field(name=f"Rep #{rep['rep_id']}",
@@ -249,12 +251,58 @@ async def rep_list(ctx: tanjun.abc.SlashContext, carrier: hikari.User, crafter:
                             )
         embed.set_footer(text=f"User has a total of {rep_num} {'carry' if rep_type else 'craft'} reps")
         embed.set_author(name=user.username, icon=user.avatar_url)
-        pages.append(embed)
+        return embed
 
-    navigator = nav.NavigatorView(pages=pages, timeout=30)
+    navigator = LazyNavigatorView(page_count=ceil(rep_num / PAGE_SIZE), build_page=build_page, timeout=30)
     await navigator.send(ctx.interaction, responded=True)
 
 
+@tanjun.with_int_slash_option("period", "The period to rank reps over",
+                              choices={"All time": 0, "Month": 30, "Week": 7}, default=0)
+@tanjun.with_str_slash_option("rep_type", "The type of reps to rank", choices=("craft", "carry"), default="craft")
+@rep_slash_group.as_sub_command("leaderboard", "Shows the users with the most reps", always_defer=True)
+async def rep_leaderboard(ctx: tanjun.abc.SlashContext, rep_type: str, period: int,
+                          config: Config = alluka.inject(type=Config),
+                          read_pool: ReadPool = alluka.inject(type=ReadPool)):
+    type_num = 0 if rep_type == "craft" else 1
+
+    cursor: Cursor
+    async with read_pool.acquire() as db, db.cursor() as cursor:
+        if period == 0:
+            await cursor.execute('''
+                SELECT receiver, count
+                FROM "REP_COUNTS"
+                WHERE type=:type AND count > 0
+                ORDER BY count DESC
+                LIMIT :limit
+            ''', {"type": type_num, "limit": LEADERBOARD_SIZE})
+        else:
+            await cursor.execute('''
+                SELECT receiver, SUM(count) AS total
+                FROM "REP_DAILY"
+                WHERE type=:type AND day > :first_day
+                GROUP BY receiver
+                ORDER BY total DESC
+                LIMIT :limit
+            ''', {"type": type_num, "first_day": int(time.time()) // 86400 - period, "limit": LEADERBOARD_SIZE})
+
+        leaders = await cursor.fetchall()
+
+    embed = hikari.Embed(
+        title=f"{rep_type.capitalize()} Rep Leaderboard",
+        color=config['colors']['primary']
+    )
+    embed.set_footer(text="All time" if period == 0 else f"Last {period} days")
+
+    if not leaders:
+        embed.description = f"No {rep_type} reps were given in this period."
+    else:
+        embed.description = "\n".join(f"**{place}.** <@{receiver}> - {count}"
+                                      for place, (receiver, count) in enumerate(leaders, start=1))
+
+    await ctx.respond(embed=embed)
+
+
 @tanjun.as_loader()
 def load(client: tanjun.Client):
     client.add_component(component)
@@ -8,7 +8,7 @@ from utils import get, profile_choices, trigger_typing
 from utils.checks.db_checks import registered_check
 from utils.checks.role_checks import weight_banned_check
 from utils.config import Config, ConfigHandler
-from utils.database import convert_to_user
+from utils.database import ReadPool, convert_to_user
 
 
 ###############
@@ -163,17 +163,16 @@ async def skycrypt(ctx: tanjun.abc.MessageContext, ign: str, profile: str = None
 
 
 @component.with_command()
-@tanjun.with_concurrency_limit("database_commands")
 @tanjun.with_all_checks(weight_banned_check, registered_check)
 @tanjun.with_str_slash_option('profile', 'Profile name. NOT YOUR IGN', key='cute_name', choices=profile_choices, default=None)
 @tanjun.as_slash_command('weight_check', 'Gives weight roles')
 async def weight_check(ctx: tanjun.abc.SlashContext, cute_name: str,
                        config: Config = alluka.inject(type=Config),
-                       db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
+                       read_pool: ReadPool = alluka.inject(type=ReadPool)):
     await trigger_typing(ctx)
 
     cursor: aiosqlite.Cursor
-    async with db.cursor() as cursor:
+    async with read_pool.acquire() as db, db.cursor() as cursor:
         await cursor.execute('''
             SELECT *
             FROM "USERS"
@@ -1,4 +1,6 @@
+import asyncio
 import datetime
+import re
 import time
 from math import ceil
 
@@ -6,23 +8,126 @@ import aiosqlite
 import alluka
 import hikari
 import tanjun
-from miru.ext import nav
 
-from utils import trigger_typing
+from utils import ResourceLocks, trigger_typing
 from utils.config import Config, ConfigHandler
-from utils.database.converters import convert_to_suggestion
+from utils.database import ReadPool, WriteBatcher, next_id, to_fts_query
+from utils.database.converters import SuggestionInfo, convert_to_suggestion
 from utils.error_utils import log_error
+from utils.pagination import PAGE_SIZE, KeysetPages, LazyNavigatorView
+
+SEARCH_LIMIT = 50  # Best matches listed by suggestion search
+SEARCH_QUERY_MAX_LENGTH = 200  # Characters, keeps the query within the results' embed title
+DUPLICATE_CANDIDATES = 10  # Open suggestions, best full-text matches first, compared against a new suggestion
+DUPLICATE_THRESHOLD = 0.5  # Shingle similarity from which an open suggestion counts as a likely duplicate
+DUPLICATES_SHOWN = 3  # Likely duplicates linked in the warning
+
+_WORD_PATTERN = re.compile(r'\w+')
+_FORCE_FLAG_PATTERN = re.compile(r'(?:^|\s+)--force(?=\s|$)')
+
+
+####################
+#  Misc Functions  #
+####################
+
+def shingles(text: str) -> set[tuple[str, ...]]:
+    """
+    Splits a text into its overlapping word pairs, or its single word if it only has one
+
+    :param text: The text
+    :return: The text's shingles
+    """
+
+    words = _WORD_PATTERN.findall(text.lower())
+
+    if len(words) < 2:
+        return {tuple(words)} if words else set()
+
+    return set(zip(words, words[1:]))
+
+
+def similarity(first: set, second: set) -> float:
+    """
+    Measures how much two shingle sets overlap
+
+    :param first: The first text's shingles
+    :param second: The second text's shingles
+    :return: The Jaccard similarity of the two shingle sets, from 0 (nothing shared) to 1 (identical)
+    """
+
+    if not first or not second:
+        return 0
+
+    return len(first & second) / len(first | second)
+
+
+async def find_duplicates(suggestion: str, read_pool: ReadPool) -> list[tuple[float, SuggestionInfo]]:
+    """
+    Finds open suggestions that are likely duplicates of the given text. The full-text index narrows
+    the open suggestions down to the few sharing the most words, only those are compared shingle by shingle
+
+    :param suggestion: The text of the new suggestion
+    :param read_pool: The pool the query runs on
+    :return: The likely duplicates with their similarity, most similar first
+    """
+
+    if (match := to_fts_query(suggestion, match_any=True)) is None:
+        return []
+
+    cursor: aiosqlite.Cursor
+    async with read_pool.acquire() as db, db.cursor() as cursor:
+        await cursor.execute('''
+            SELECT "SUGGESTIONS".*
+            FROM "SUGGESTIONS_FTS"
+            JOIN "SUGGESTIONS" ON "SUGGESTIONS".suggestion_number="SUGGESTIONS_FTS".rowid
+            WHERE "SUGGESTIONS_FTS" MATCH :match AND "SUGGESTIONS".answered=0
+            ORDER BY bm25("SUGGESTIONS_FTS")
+            LIMIT :limit
+        ''', {"match": match, "limit": DUPLICATE_CANDIDATES})
+        candidates = [convert_to_suggestion(row) for row in await cursor.fetchall()]
+
+    new_shingles = shingles(suggestion)
+    duplicates = [(score, candidate) for candidate in candidates
+                  if (score := similarity(new_shingles, shingles(candidate['suggestion']))) >= DUPLICATE_THRESHOLD]
+
+    return sorted(duplicates, key=lambda duplicate: duplicate[0], reverse=True)
+
 
 
 #############################
 #    Commands' Functions    #
 #############################
 
+def suggestion_field(suggestion: SuggestionInfo, config: Config) -> tuple[str, str]:
+    """
+    Builds the embed field listing a suggestion
+
+    :param suggestion: The suggestion
+    :param config: The config
+    :return: The field's name and value
+    """
+
+    name = f"__Suggestion **#{suggestion['suggestion_number']}**__ "
+    value = f"*\\- Created By: <@{suggestion['author_id']}>*\n"
+
+    if suggestion['answered']:
+        name += "✅" if suggestion['approved'] else "❌"
+        value += "*\\- " + (
+            "Approved" if suggestion['approved'] else "Denied") + f" By: <@{suggestion['approved_by']}>*\n"
+
+    value += (
+        f"*\\- Message Link: https://discord.com/channels/{config['server_id']}/"
+        f"{config['suggestions']['suggestions_channel_id']}/{suggestion['message_id']}*"
+        f"```{suggestion['suggestion']}```")
+
+    return name, value
+
+
 async def answer_suggestion(ctx: tanjun.abc.SlashContext, suggestion_id: int, reason: str, is_approved: bool, dm: bool,
                             config: Config,
-                            db: aiosqlite.Connection):
+                            read_pool: ReadPool):
     cursor: aiosqlite.Cursor
-    async with db.cursor() as cursor:
+    async with read_pool.acquire() as db, db.cursor() as cursor:
         await cursor.execute('''
             SELECT *
             FROM SUGGESTIONS
@@ -61,7 +166,7 @@ async def answer_suggestion(ctx: tanjun.abc.SlashContext, suggestion_id: int, re
 
     sg_author_icon = None
     if isinstance(sg_author, hikari.User):
-        sg_author_icon = await sg_author.display_avatar_url.read()
+        sg_author_icon = sg_author.display_avatar_url
 
     suggestion_embed.set_author(name=f'Suggested by {sg_author}', icon=sg_author_icon)
     suggestion_embed.add_field(name="Reason", value=f"{reason}", inline=False)
@@ -115,7 +220,7 @@ async def answer_suggestion(ctx: tanjun.abc.SlashContext, suggestion_id: int, re
     # Send the embed
     await ctx.respond(embed=answered_embed)
 
-    await db.execute('''
+    await WriteBatcher().execute('''
         UPDATE "SUGGESTIONS"
         SET "answered"=:answered, "approved"=:approved, "reason"=:reason, "approved_by"=:approved_by
         WHERE "suggestion_number"=:suggestion_id;
@@ -126,7 +231,6 @@ async def answer_suggestion(ctx: tanjun.abc.SlashContext, suggestion_id: int, re
         "approved_by": ctx.author.id,
         "suggestion_id": suggestion_id,
     })
-    await db.commit()
 
 
 ################
@@ -142,14 +246,26 @@ component.add_slash_command(suggestion_group)
 
 
 @component.with_command()
-@tanjun.with_concurrency_limit("database_commands")
-@tanjun.with_greedy_argument('suggestion')
 @tanjun.as_message_command('suggest')
-async def suggest(ctx: tanjun.abc.MessageContext, suggestion: str,
+async def suggest(ctx: tanjun.abc.MessageContext,
                   config: Config = alluka.inject(type=Config),
-                  db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
+                  read_pool: ReadPool = alluka.inject(type=ReadPool)):
     await trigger_typing(ctx)
 
+    # Parsed by hand, the argument parser would read the word after --force as its value
+    # and treat any other word starting with - as an option too
+    suggestion, force = _FORCE_FLAG_PATTERN.subn('', ctx.content)
+    suggestion = suggestion.strip()
+
+    if not suggestion:
+        embed = hikari.Embed(
+            title="Error",
+            description="Usage: `+suggest <suggestion> [--force]`",
+            color=config['colors']['error']
+        )
+        await ctx.respond(embed=embed)
+        return
+
     if len(suggestion) > 500:
         embed = hikari.Embed(
             title="Error",
@@ -159,13 +275,22 @@ async def suggest(ctx: tanjun.abc.MessageContext, suggestion: str,
         await ctx.respond(embed=embed)
         return
 
-    cursor: aiosqlite.Cursor
-    async with db.cursor() as cursor:
-        await cursor.execute("""
-            SELECT max(suggestion_number)
-            FROM "SUGGESTIONS"
-        """)
-        suggestion_num = (await cursor.fetchone())[0] + 1
+    # Checked before anything is posted, so a duplicate costs no Discord calls
+    if not force and (duplicates := await find_duplicates(suggestion, read_pool)):
+        embed = hikari.Embed(
+            title="Possible Duplicate",
+            description="Your suggestion looks like these open suggestions:\n" + "\n".join(
+                f"- Suggestion #{duplicate['suggestion_number']} ({score:.0%} similar): "
+                f"https://discord.com/channels/{config['server_id']}/"
+                f"{config['suggestions']['suggestions_channel_id']}/{duplicate['message_id']}"
+                for score, duplicate in duplicates[:DUPLICATES_SHOWN]
+            ) + "\n\nIf it is not a duplicate, run the command again with `--force`.",
+            color=config['colors']['secondary']
+        )
+        await ctx.respond(embed=embed)
+        return
+
+    suggestion_num = await next_id('suggestion_number')
 
     # Create embed
     suggestion_embed = hikari.Embed(
@@ -175,13 +300,9 @@ async def suggest(ctx: tanjun.abc.MessageContext, suggestion: str,
         color=config['colors']['primary']
     )
 
-    # Set author icon if there is one
-    if ctx.message.author.display_avatar_url is not None:
-        suggestion_embed.set_author(name=f"Suggested by {ctx.message.author}",
-                                    icon=await ctx.message.author.display_avatar_url.read())
-
-    else:
-        suggestion_embed.set_author(name=f"Suggested by {ctx.message.author}")
+    # Linked, not uploaded, Discord's clients load it from the CDN
+    suggestion_embed.set_author(name=f"Suggested by {ctx.message.author}",
+                                icon=ctx.message.author.display_avatar_url)
 
     suggestion_embed.set_footer(text=f"Suggestion number {suggestion_num}")
     # suggestion_embed.set_thumbnail(config['logo_url'])
@@ -189,12 +310,18 @@ async def suggest(ctx: tanjun.abc.MessageContext, suggestion: str,
     channel = ctx.get_guild().get_channel(config['suggestions']['suggestions_channel_id'])
     message: hikari.Message = await channel.send(embed=suggestion_embed)
 
-    await message.add_reaction('✅')
-    await message.add_reaction('❌')
-    thread_id = await ctx.rest.create_message_thread(
-        channel.id, message.id,
-        f"Suggestion No. {suggestion_num}",
-        auto_archive_duration=datetime.timedelta(days=3)
+    async def add_reactions():
+        # One after the other so they always show in this order
+        await message.add_reaction('✅')
+        await message.add_reaction('❌')
+
+    _, thread_id = await asyncio.gather(
+        add_reactions(),
+        ctx.rest.create_message_thread(
+            channel.id, message.id,
+            f"Suggestion No. {suggestion_num}",
+            auto_archive_duration=datetime.timedelta(days=3)
+        )
     )
 
     embed = hikari.Embed(
@@ -204,7 +331,7 @@ async def suggest(ctx: tanjun.abc.MessageContext, suggestion: str,
     )
     await ctx.respond(embed=embed)
 
-    await db.execute('''
+    await WriteBatcher().execute('''
         INSERT INTO "SUGGESTIONS" (suggestion_number, message_id, author_id, suggestion, created_at, thread_id) 
         VALUES (:suggestion_number, :message_id, :author_id, :suggestion, :created_at, :thread_id)
     ''', {
@@ -215,68 +342,66 @@ async def suggest(ctx: tanjun.abc.MessageContext, suggestion: str,
         "created_at": int(time.time()),
         "thread_id": thread_id.id
     })
-    await db.commit()
 
 
-@tanjun.with_concurrency_limit("database_commands")
 @tanjun.with_bool_slash_option("dm", "Should the bot dm the user", default=True)
 @tanjun.with_str_slash_option("reason", "The reason for approving", default=None)
 @tanjun.with_int_slash_option("suggestion", "The suggestion's ID to approve", key="suggestion_id")
 @suggestion_group.as_sub_command("approve", "Approves the given suggestion", always_defer=True)
 async def suggestion_approve(ctx: tanjun.abc.SlashContext, suggestion_id: int, reason: str, dm: bool,
                              config: Config = alluka.inject(type=Config),
-                             db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
-    await answer_suggestion(ctx, suggestion_id, reason, True, dm, config, db)
+                             read_pool: ReadPool = alluka.inject(type=ReadPool)):
+    async with ResourceLocks().hold(('suggestion', suggestion_id)):
+        await answer_suggestion(ctx, suggestion_id, reason, True, dm, config, read_pool)
 
 
-@tanjun.with_concurrency_limit("database_commands")
 @tanjun.with_bool_slash_option("dm", "Should the bot dm the user", default=True)
 @tanjun.with_str_slash_option("reason", "The reason for denying", default=None)
 @tanjun.with_int_slash_option("suggestion", "The suggestion's ID to deny", key="suggestion_id")
 @suggestion_group.as_sub_command("deny", "Denies the given suggestion", always_defer=True)
 async def suggestion_deny(ctx: tanjun.abc.SlashContext, suggestion_id: int, reason: str, dm: bool,
                           config: Config = alluka.inject(type=Config),
-                          db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
-    await answer_suggestion(ctx, suggestion_id, reason, False, dm, config, db)
+                          read_pool: ReadPool = alluka.inject(type=ReadPool)):
+    async with ResourceLocks().hold(('suggestion', suggestion_id)):
+        await answer_suggestion(ctx, suggestion_id, reason, False, dm, config, read_pool)
 
 
-@tanjun.with_concurrency_limit("database_commands")
 @tanjun.with_int_slash_option("suggestion", "The suggestion's ID to remove", key="suggestion_id")
 @suggestion_group.as_sub_command("delete", "Deletes the given suggestion", always_defer=True)
 async def suggestion_delete(ctx: tanjun.abc.SlashContext, suggestion_id: int,
                             config: Config = alluka.inject(type=Config),
-                            db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
-    cursor: aiosqlite.Cursor
-    async with db.cursor() as cursor:
-        await cursor.execute("""
-            SELECT *
+                            read_pool: ReadPool = alluka.inject(type=ReadPool)):
+    async with ResourceLocks().hold(('suggestion', suggestion_id)):
+        cursor: aiosqlite.Cursor
+        async with read_pool.acquire() as db, db.cursor() as cursor:
+            await cursor.execute("""
+                SELECT *
+                FROM "SUGGESTIONS"
+                WHERE suggestion_number=:suggestion_id
+            """, {
+                "suggestion_id": suggestion_id
+            })
+            res = await cursor.fetchone()
+        # Check if suggestion with given ID exists
+        if res is None:
+            embed = hikari.Embed(
+                title="Error",
+                description=f"Suggestion with ID {suggestion_id} not found",
+                color=config['colors']['error']
+            )
+            await ctx.respond(embed=embed)
+            return
+
+        suggestion = convert_to_suggestion(res)
+
+        # Delete suggestion
+        await WriteBatcher().execute("""
+            DELETE
             FROM "SUGGESTIONS"
             WHERE suggestion_number=:suggestion_id
         """, {
             "suggestion_id": suggestion_id
         })
-        res = await cursor.fetchone()
-    # Check if suggestion with given ID exists
-    if res is None:
-        embed = hikari.Embed(
-            title="Error",
-            description=f"Suggestion with ID {suggestion_id} not found",
-            color=config['colors']['error']
-        )
-        await ctx.respond(embed=embed)
-        return
-
-    suggestion = convert_to_suggestion(res)
-
-    # Delete suggestion
-    await db.execute("""
-        DELETE
-        FROM "SUGGESTIONS"
-        WHERE suggestion_number=:suggestion_id
-    """, {
-        "suggestion_id": suggestion_id
-    })
-    await db.commit()
 
     msg = "Suggestion deleted"
     try:
@@ -300,14 +425,13 @@ async def suggestion_delete(ctx: tanjun.abc.SlashContext, suggestion_id: int,
     await ctx.respond(embed=embed)
 
 
-@tanjun.with_concurrency_limit("database_commands")
 @tanjun.with_user_slash_option("author", "The author of the suggestion", default=None)
 @tanjun.with_int_slash_option("option", "Which suggestions to list", default=1,
                               choices=dict(All=0, Pending=1, Approved=2, Denied=3))
 @suggestion_group.as_sub_command("list", "Lists suggestions")
 async def suggestion_list(ctx: tanjun.abc.SlashContext, author: hikari.User, option: str,
                           config: Config = tanjun.inject(),
-                          db: aiosqlite.Connection = tanjun.inject()):
+                          read_pool: ReadPool = tanjun.inject(type=ReadPool)):
     # 4 cases. no user & no option | no user & option | user & no option | user & option
     script = f"""
         SELECT *
@@ -327,14 +451,10 @@ async def suggestion_list(ctx: tanjun.abc.SlashContext, author: hikari.User, opt
     elif option == 3:
         script += "answered == 1 AND approved == 0"
 
-    script += "\nORDER BY created_at DESC"
-
-    cursor: aiosqlite.Cursor
-    async with db.cursor() as cursor:
-        await cursor.execute(script, {"author_id": author.id if author else None})
-        res = await cursor.fetchall()
+    suggestions = KeysetPages(read_pool, script, {"author_id": author.id if author else None},
+                              key='suggestion_number', descending=True)
 
-    if (rows := len(list(res))) == 0:
+    if (rows := await suggestions.count()) == 0:
         embed = hikari.Embed(
             title="Nothing to show",
             description="No suggestions passed the filters",
@@ -343,29 +463,71 @@ async def suggestion_list(ctx: tanjun.abc.SlashContext, author: hikari.User, opt
         await ctx.respond(embed=embed)
         return
 
-    pages = []
-    pages_num = ceil(rows / 10)
-    for page in range(1, pages_num + 1):
+    async def build_page(page: int) -> hikari.Embed:
         embed = hikari.Embed(
             title="Suggestions",
             color=config['colors']['primary']
         )
 
-        for suggestion in res[(page - 1) * 10:page * 10]:
-            suggestion = convert_to_suggestion(suggestion)
+        for suggestion in await suggestions.fetch(page):
+            name, value = suggestion_field(convert_to_suggestion(suggestion), config)
 
-            name = f"__Suggestion **#{suggestion['suggestion_number']}**__ "
-            value = f"*\\- Created By: <@{suggestion['author_id']}>*\n"
+            embed.add_field(
+                name=name,
+                value=value,
+                inline=False
+            )
+
+        return embed
+
+    navigator = LazyNavigatorView(page_count=ceil(rows / PAGE_SIZE), build_page=build_page, timeout=30)
+    await navigator.send(ctx.interaction, ephemeral=True)
+
+
+@tanjun.with_str_slash_option("query", "The words to search for", max_length=SEARCH_QUERY_MAX_LENGTH)
+@suggestion_group.as_sub_command("search", "Searches the suggestions' text")
+async def suggestion_search(ctx: tanjun.abc.SlashContext, query: str,
+                            config: Config = tanjun.inject(),
+                            read_pool: ReadPool = tanjun.inject(type=ReadPool)):
+    if (match := to_fts_query(query)) is None:
+        embed = hikari.Embed(
+            title="Error",
+            description="The query must contain at least one word",
+            color=config['colors']['error']
+        )
+        await ctx.respond(embed=embed)
+        return
 
-            if suggestion['answered']:
-                name += "✅" if suggestion['approved'] else "❌"
-                value += "*\\- " + (
-                    "Approved" if suggestion['approved'] else "Denied") + f" By: <@{suggestion['approved_by']}>*\n"
+    cursor: aiosqlite.Cursor
+    async with read_pool.acquire() as db, db.cursor() as cursor:
+        # Best matches first, bm25 scores better matches lower
+        await cursor.execute('''
+            SELECT "SUGGESTIONS".*
+            FROM "SUGGESTIONS_FTS"
+            JOIN "SUGGESTIONS" ON "SUGGESTIONS".suggestion_number="SUGGESTIONS_FTS".rowid
+            WHERE "SUGGESTIONS_FTS" MATCH :match
+            ORDER BY bm25("SUGGESTIONS_FTS")
+            LIMIT :limit
+        ''', {"match": match, "limit": SEARCH_LIMIT})
+        suggestions = [convert_to_suggestion(row) for row in await cursor.fetchall()]
+
+    if not suggestions:
+        embed = hikari.Embed(
+            title="Nothing to show",
+            description="No suggestions matched the query",
+            color=config['colors']['secondary']
+        )
+        await ctx.respond(embed=embed)
+        return
+
+    async def build_page(page: int) -> hikari.Embed:
+        embed = hikari.Embed(
+            title=f"Suggestions matching \"{query}\"",
+            color=config['colors']['primary']
+        )
 
-            value += (
-                f"*\\- Message Link: https://discord.com/channels/{config['server_id']}/"
-                f"{config['suggestions']['suggestions_channel_id']}/{suggestion['message_id']}*"
-                f"```{suggestion['suggestion']}```")
+        for suggestion in suggestions[page * PAGE_SIZE: (page + 1) * PAGE_SIZE]:
+            name, value = suggestion_field(suggestion, config)
 
             embed.add_field(
                 name=name,
@@ -373,9 +535,9 @@ async def suggestion_list(ctx: tanjun.abc.SlashContext, author: hikari.User, opt
                 inline=False
             )
 
-        pages.append(embed)
+        return embed
 
-    navigator = nav.NavigatorView(pages=pages, timeout=30)
+    navigator = LazyNavigatorView(page_count=ceil(len(suggestions) / PAGE_SIZE), build_page=build_page, timeout=30)
     await navigator.send(ctx.interaction, ephemeral=True)
 
 
@@ -3,36 +3,44 @@ import os
 import tarfile
 import time
 
-import aiohttp
 import aiosqlite
 import alluka
 import hikari.api.cache
 import tanjun
 from aiosqlite import Connection
 
+from utils import Priority, ResourceLocks
 from utils.config import Config, ConfigHandler
-from utils.database import DBConnection, convert_to_user
+from utils.database import ReadPool, WriteBatcher
 from utils.error_utils import exception_to_string
+from utils.hypixel import GuildSnapshots, HypixelAPIError, build_report, save_report
 
-api_key = os.getenv('APIKEY')
+MEMBERSHIP_WRITE_CHUNK = 500  # Rows written per transaction when updating guild memberships
 
 component = tanjun.Component()
 
 
+@tanjun.as_interval(datetime.timedelta(hours=1))
+async def refresh_guild_snapshots(cache: hikari.api.Cache = alluka.inject(type=hikari.api.Cache),
+                                  config: Config = alluka.inject(type=Config)):
+    for exception in await GuildSnapshots().refresh_all():
+        await cache.get_guild(config['server_id']).get_channel(config['bot_log_channel_id']) \
+            .send(exception_to_string('refresh_guild_snapshots task', exception))
+
+
 @tanjun.as_interval(datetime.timedelta(hours=1))
 async def update_member_count(cache: hikari.api.Cache = alluka.inject(type=hikari.api.Cache),
                               config: Config = alluka.inject(type=Config)):
     total_members = 0  # Stores the member count of all the guilds combined
     for idx, guild in enumerate(config['guilds'].keys()):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"https://api.hypixel.net/guild?key={api_key}&id="
-                                       f"{config['guilds'][guild]['guild_uuid']}") as resp:
-                    assert resp.status == 200  # Unless a guild gets deleted this will never raise
+            snapshot = await GuildSnapshots().get_guild(config['guilds'][guild]['guild_uuid'],
+                                                        priority=Priority.BACKGROUND)
+            assert snapshot is not None  # Unless a guild gets deleted this will never raise
 
-                    guild_info = (await resp.json())["guild"]
+            guild_info = snapshot["guild"]
 
-        except AssertionError:
+        except (AssertionError, HypixelAPIError):
 
             await cache.get_available_guild(config['server_id']).get_channel(config['bot_log_channel_id']) \
                 .send(f"Guild info fetch with id `{config['guilds'][guild]['guild_uuid']}` "
@@ -71,7 +79,15 @@ async def update_member_count(cache: hikari.api.Cache = alluka.inject(type=hikar
 
 
 @tanjun.as_interval(datetime.timedelta(days=1))
-async def backup_db():
+async def backup_db(cache: hikari.api.Cache = alluka.inject(type=hikari.api.Cache),
+                    config: Config = alluka.inject(type=Config)):
+    # Move the WAL into the database file so the archive has every committed write
+    try:
+        await WriteBatcher().checkpoint()
+    except Exception as exception:
+        await cache.get_guild(config['server_id']).get_channel(config['bot_log_channel_id']) \
+            .send(exception_to_string('backup_db task', exception))
+
     with tarfile.open("./backup/backup.tar.gz", "w:gz") as tar_handle:
         for root, dirs, files in os.walk("./data"):
             for file in files:
@@ -82,29 +98,25 @@ async def backup_db():
 
 
 @tanjun.as_interval(datetime.timedelta(days=1))
-async def check_verified(db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection),
+async def check_verified(read_pool: ReadPool = alluka.inject(type=ReadPool),
                          cache: hikari.api.Cache = alluka.inject(type=hikari.api.Cache),
                          config: Config = alluka.inject(type=Config)
                          ):
-    cursor: aiosqlite.Cursor = await DBConnection().get_db().cursor()
+    snapshots = {}  # Guild ID -> member UUIDs, for every guild fetched successfully
 
-    uuids = ()
-
-    for idx, guild in enumerate(config['guilds'].keys()):
+    for guild in config['guilds'].keys():
 
         guild_uuid = config['guilds'][guild]["guild_uuid"]
 
         try:
             # fetch guild members
-            async with aiohttp.ClientSession() as session:
-                res = await session.get(f"https://api.hypixel.net/guild?id={guild_uuid}&key={api_key}")
+            snapshot = await GuildSnapshots().get_guild(guild_uuid, priority=Priority.BACKGROUND)
 
-                assert res.status == 200
+            assert snapshot is not None
 
-                data = await res.json()
-                guild_members = data["guild"]["members"]
+            snapshots[guild_uuid] = snapshot["member_uuids"]
 
-        except AssertionError:
+        except (AssertionError, HypixelAPIError):
             await cache.get_guild(config['server_id']) \
                 .get_channel(config['bot_log_channel_id']) \
                 .send(f"Guild info fetch with id `{config['guilds'][guild]['guild_uuid']}` "
@@ -117,58 +129,93 @@ async def check_verified(db: aiosqlite.Connection = alluka.inject(type=aiosqlite
                 .send(exception_to_string('check_verified task', exception))
             continue
 
-        await cursor.execute(f'''
-            SELECT *
+    membership_roles = set(config['verify']['guild_member_roles']) | {config['verify']['member_role_id']}
+
+    cursor: aiosqlite.Cursor
+    async with read_pool.acquire() as db, db.cursor() as cursor:
+        await cursor.execute('''
+            SELECT uuid, discord_id, guild_uuid
             FROM "USERS"
-            WHERE guild_uuid=:guild_uuid
-        ''', {
-            "guild_uuid": guild_uuid
-        })
+            WHERE discord_id > 1
+        ''')
+        users = await cursor.fetchall()
+
+    changes = []  # Users who left their guild. Joining a guild is only picked up by verifying again
+
+    for uuid, discord_id, guild_uuid in users:
+        # Skip users still in their guild, users in no guild and users whose guild could not be fetched
+        if guild_uuid not in snapshots or uuid in snapshots[guild_uuid]:
+            continue
 
-        members = await cursor.fetchall()
+        # The old guild is matched on write, so a member who verifies again during the run keeps their new one
+        changes.append({"uuid": uuid, "guild_uuid": None, "old_guild_uuid": guild_uuid})
 
-        for member in members:
-            member = convert_to_user(member)
+        # Held like verify and unverify do, so their role edits and this one don't interleave
+        async with ResourceLocks().hold(('member', discord_id)):
+            async with read_pool.acquire() as db, db.cursor() as cursor:
+                await cursor.execute('SELECT guild_uuid FROM "USERS" WHERE uuid=:uuid', {"uuid": uuid})
+                current = await cursor.fetchone()
 
-            if any(g_member['uuid'] == member['uuid'] for g_member in guild_members):
+            # Verified again since the users were read
+            if current is None or current[0] != guild_uuid:
                 continue
 
-            discord_member = cache.get_guild(config['server_id']).get_member(member['discord_id'])
+            discord_member = cache.get_guild(config['server_id']).get_member(discord_id)
 
             if not discord_member:
                 continue
 
-            for role in config['verify']['guild_member_roles']:
-                role = cache.get_guild(config["server_id"]) \
-                    .get_role(role)
-                await discord_member.remove_role(role)
+            # Remove the membership roles in a single edit
+            roles = set(discord_member.role_ids) - membership_roles
 
-            role = cache.get_guild(config["server_id"]) \
-                .get_role(config['verify']['member_role_id'])
-            await discord_member.remove_role(role)
-            uuids = uuids + (f"'{member['uuid']}'",)
+            if roles == set(discord_member.role_ids):
+                continue
 
-    await cursor.execute(f'''
-        UPDATE "USERS"
-        SET "guild_uuid"=NULL
-        WHERE "uuid" IN ({', '.join(uuid for uuid in uuids)})
-        ''')
+            try:
+                await discord_member.edit(roles=roles, reason='Guild membership check')
+            except hikari.HTTPError as exception:
+                await cache.get_guild(config['server_id']) \
+                    .get_channel(config['bot_log_channel_id']) \
+                    .send(exception_to_string('check_verified task', exception))
+
+    # Commit in chunks so a large wave of changes doesn't hold the connection in one long transaction
+    for i in range(0, len(changes), MEMBERSHIP_WRITE_CHUNK):
+        await WriteBatcher().executemany('''
+            UPDATE "USERS"
+            SET "guild_uuid"=:guild_uuid
+            WHERE "uuid"=:uuid AND "guild_uuid"=:old_guild_uuid
+        ''', changes[i:i + MEMBERSHIP_WRITE_CHUNK])
 
-    await cursor.close()
-    await db.commit()
+
+@tanjun.as_interval(datetime.timedelta(hours=12))
+async def inactive_reports(cache: hikari.api.Cache = alluka.inject(type=hikari.api.Cache),
+                           config: Config = alluka.inject(type=Config)):
+    for guild in config['guilds'].keys():
+        try:
+            report, errors = await build_report(config['guilds'][guild]['guild_uuid'])
+            if report is not None:
+                await save_report(report)
+
+        except Exception as exception:
+            await cache.get_guild(config['server_id']).get_channel(config['bot_log_channel_id']) \
+                .send(exception_to_string('inactive_reports task', exception))
+
+        else:
+            if errors:
+                await cache.get_guild(config['server_id']).get_channel(config['bot_log_channel_id']) \
+                    .send(f"{len(errors)} player lookups failed while checking {guild} for inactives.\n"
+                          + exception_to_string('inactive_reports task', errors[0]))
 
 
 @tanjun.as_interval(datetime.timedelta(hours=12))
-async def inactives_check(db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection),
-                          cache: hikari.api.Cache = alluka.inject(type=hikari.api.Cache),
+async def inactives_check(cache: hikari.api.Cache = alluka.inject(type=hikari.api.Cache),
                           config: Config = alluka.inject(type=Config)):
     try:
-        await db.execute(f'''
+        await WriteBatcher().execute(f'''
             UPDATE "USERS"
             SET inactive_until=null
             WHERE inactive_until<{int(time.time())}
         ''')
-        await db.commit()
     except Exception as exception:
         await cache.get_guild(config["server_id"]) \
             .get_channel(config['bot_log_channel_id']) \
@@ -179,6 +226,8 @@ async def inactives_check(db: aiosqlite.Connection = alluka.inject(type=aiosqlit
 def load(client: tanjun.Client):
     config = ConfigHandler().get_config()
 
+    if config['tasks']['activated'].get('guild_snapshots', False):
+        component.add_schedule(refresh_guild_snapshots)
     if config['tasks']['activated']['backup_db']:
         component.add_schedule(backup_db)
     if config['tasks']['activated']['update_member_count']:
@@ -187,6 +236,8 @@ def load(client: tanjun.Client):
         component.add_schedule(check_verified)
     if config['tasks']['activated']['inactives_check']:
         component.add_schedule(inactives_check)
+    if config['tasks']['activated'].get('inactive_reports', False):
+        component.add_schedule(inactive_reports)
 
     client.add_component(component)
 
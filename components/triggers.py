@@ -6,12 +6,12 @@ from math import ceil
 import alluka
 import hikari.api.cache
 import tanjun
-from miru.ext import nav
 
 from utils import trigger_typing
 from utils.config import Config, ConfigHandler
 from utils.error_utils import log_error
-from utils.triggers.triggers import TriggerInfo, TriggersFileHandler
+from utils.pagination import PAGE_SIZE, LazyNavigatorView
+from utils.triggers.triggers import MATCH_CONTAINS, MATCH_EXACT, MATCH_WORD, TriggerInfo, TriggersFileHandler
 
 trigger_handler = TriggersFileHandler()
 trigger_handler.load_triggers()
@@ -34,13 +34,16 @@ ct_json_slash_group = ct_slash_group.make_sub_group("json", "Edit triggers file
 @tanjun.with_member_slash_option("user3", "Additional user", default=None, key='user4')
 @tanjun.with_member_slash_option("user2", "Additional user", default=None, key='user3')
 @tanjun.with_member_slash_option("user1", "Additional user", default=None, key='user2')
+@tanjun.with_str_slash_option("match", "Where the trigger has to appear in a message", default=MATCH_EXACT,
+                              choices={"Whole message": MATCH_EXACT, "Anywhere": MATCH_CONTAINS,
+                                       "As whole words": MATCH_WORD})
 @tanjun.with_bool_slash_option("overwrite", "Whether to skip checking if trigger already exists or not.", default=False)
 @tanjun.with_str_slash_option("response", "Trigger response", key='response1')
 @tanjun.with_member_slash_option("owner", "Owner of the trigger", key='user1')
 @tanjun.with_str_slash_option("trigger", "Phrase that will trigger a response")
 @ct_slash_group.as_sub_command("add", "Add a new chat trigger")
 async def ct_add(ctx: tanjun.abc.SlashContext, trigger: str, user1: hikari.Member, response1: str, overwrite: bool,
-                 user2: hikari.Member, user3: hikari.Member, user4: hikari.Member, user5: hikari.Member,
+                 match: str, user2: hikari.Member, user3: hikari.Member, user4: hikari.Member, user5: hikari.Member,
                  response2: str, response3: str, response4: str, response5: str,
                  config: Config = alluka.inject(type=Config)):
     await trigger_typing(ctx)
@@ -55,7 +58,8 @@ async def ct_add(ctx: tanjun.abc.SlashContext, trigger: str, user1: hikari.Membe
     trigger_info: TriggerInfo = {
         "owner": [user.id for user in args.values() if isinstance(user, hikari.Member)],
         "reply": [response for response in args.values() if isinstance(response, str)],
-        "enabled": True
+        "enabled": True,
+        "match": match
     }
 
     try:
@@ -133,14 +137,14 @@ async def ct_list(ctx: tanjun.abc.SlashContext, config: Config = alluka.inject(t
         await ctx.respond(embed=embed)
         return
 
-    pages = []
-    pages_num = ceil(triggers_num / 10)
-    for page in range(1, pages_num + 1):
+    trigger_keys = list(triggers.keys())
+
+    async def build_page(page: int) -> hikari.Embed:
         embed = hikari.Embed(
             title='Triggers',
             color=config['colors']['primary']
         )
-        for t_key in list(triggers.keys())[(page - 1) * 10: page * 10]:
+        for t_key in trigger_keys[page * PAGE_SIZE: (page + 1) * PAGE_SIZE]:
             trigger = triggers[t_key]
             users_str = ""
             if len(users := trigger['owner'][1:]):
@@ -157,11 +161,12 @@ async def ct_list(ctx: tanjun.abc.SlashContext, config: Config = alluka.inject(t
                 value=f"*Owner*: <@{trigger['owner'][0]}>\n"
                       f"{users_str}"
                       f"{replies_str}\n"
-                      f"*Enabled*: {bool(trigger['enabled'])}"
+                      f"*Enabled*: {bool(trigger['enabled'])}\n"
+                      f"*Match*: {trigger.get('match', MATCH_EXACT)}"
             )
-        pages.append(embed)
+        return embed
 
-    navigator = nav.NavigatorView(pages=pages, autodefer=True)
+    navigator = LazyNavigatorView(page_count=ceil(triggers_num / PAGE_SIZE), build_page=build_page, autodefer=True)
     await navigator.send(ctx.interaction)
 
 
@@ -7,12 +7,13 @@ import alluka
 import hikari
 import tanjun
 
-from utils import get, trigger_typing
+from utils import ResourceLocks, UUIDCache, get, trigger_typing
 from utils.checks.db_checks import registered_check
 from utils.config import Config, ConfigHandler
 from utils.converters import PlayerInfo, to_player_info
-from utils.database import convert_to_user
+from utils.database import ReadPool, WriteBatcher, convert_to_user
 from utils.error_utils import log_error
+from utils.hypixel import GuildSnapshots
 
 ##############
 #   Config   #
@@ -38,59 +39,57 @@ component = tanjun.Component()
 
 @component.with_command(follow_wrapped=True)
 @tanjun.with_cooldown("api_commands", follow_wrapped=True)
-@tanjun.with_concurrency_limit("database_commands", follow_wrapped=True)
 @tanjun.annotations.with_annotated_args(follow_wrapped=True)
 @tanjun.as_message_command('verify')
 @tanjun.as_slash_command('verify', 'Links your hypixel account')
 async def verify(ctx: tanjun.abc.Context, ign: Annotated[tanjun.annotations.Str, "Your IGN"],
-                 config: Config = alluka.inject(type=Config),
-                 db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
+                 config: Config = alluka.inject(type=Config)):
     await trigger_typing(ctx)
-    await verification_routine(ctx, ctx.member, ign, config, db)
+
+    async with ResourceLocks().hold(('member', ctx.member.id)):
+        await verification_routine(ctx, ctx.member, ign, config)
 
 
 @component.with_command()
 @tanjun.with_cooldown("api_commands")
-@tanjun.with_concurrency_limit("database_commands")
 @tanjun.annotations.with_annotated_args()
 @tanjun.as_slash_command('force-verify', 'Force link a hypixel account', default_to_ephemeral=True,
                          default_member_permissions=hikari.Permissions.MUTE_MEMBERS)
 async def force_verify(ctx: tanjun.abc.Context, member: Annotated[tanjun.annotations.Member, "The member"],
                        ign: Annotated[tanjun.annotations.Str, "The IGN"],
-                       config: Config = alluka.inject(type=Config),
-                       db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
+                       config: Config = alluka.inject(type=Config)):
     await trigger_typing(ctx)
-    await verification_routine(ctx, member, ign, config, db)
+
+    async with ResourceLocks().hold(('member', member.id)):
+        await verification_routine(ctx, member, ign, config)
 
 
 @component.with_command(follow_wrapped=True)
 @tanjun.with_check(registered_check, follow_wrapped=True)
-@tanjun.with_concurrency_limit("database_commands", follow_wrapped=True)
 @tanjun.as_message_command('unverify')
 @tanjun.as_slash_command('unverify', 'Removes the link to your hypixel account')
 async def unverify(ctx: tanjun.abc.Context,
-                   config: Config = alluka.inject(type=Config),
-                   db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
+                   config: Config = alluka.inject(type=Config)):
     # Perform a left outer intersection on the current roles and the roles to be removed
-    roles = list(ctx.member.role_ids)
-    roles_to_remove = [hikari.Snowflake(r) for r in config['verify']['guild_member_roles']] + \
-                      [hikari.Snowflake(config['verify']['member_role_id']),
-                       hikari.Snowflake(config['verify']['verified_role_id'])]
-    roles = list(dict.fromkeys(roles + roles_to_remove))
-
-    for role in roles_to_remove:
-        roles.remove(role)
-
-    await ctx.member.edit(roles=roles, reason='Unverify')
-
-    await db.execute('''
-        UPDATE "USERS"
-        SET discord_id=1, guild_uuid=NULL
-        WHERE discord_id=:discord_id
-    ''', {
-        "discord_id": ctx.member.id
-    })
-    await db.commit()
+    async with ResourceLocks().hold(('member', ctx.member.id)):
+        roles = list(ctx.member.role_ids)
+        roles_to_remove = [hikari.Snowflake(r) for r in config['verify']['guild_member_roles']] + \
+                          [hikari.Snowflake(config['verify']['member_role_id']),
+                           hikari.Snowflake(config['verify']['verified_role_id'])]
+        roles = list(dict.fromkeys(roles + roles_to_remove))
+
+        for role in roles_to_remove:
+            roles.remove(role)
+
+        await ctx.member.edit(roles=roles, reason='Unverify')
+
+        await WriteBatcher().execute('''
+            UPDATE "USERS"
+            SET discord_id=1, guild_uuid=NULL
+            WHERE discord_id=:discord_id
+        ''', {
+            "discord_id": ctx.member.id
+        })
 
     embed = hikari.Embed(
         title=f'Verification',
@@ -107,7 +106,7 @@ async def unverify(ctx: tanjun.abc.Context,
                          default_member_permissions=hikari.Permissions.MUTE_MEMBERS)
 async def user_info(ctx: tanjun.abc.Context, user: hikari.User, player_info: PlayerInfo,
                     config: Config = alluka.inject(type=Config),
-                    db: aiosqlite.Connection = alluka.inject(type=aiosqlite.Connection)):
+                    read_pool: ReadPool = alluka.inject(type=ReadPool)):
     # Make script depending on info passed
     if user is not None:
         script = ('''
@@ -135,7 +134,7 @@ async def user_info(ctx: tanjun.abc.Context, user: hikari.User, player_info: Pla
         })
 
     cursor: aiosqlite.Cursor
-    async with db.cursor() as cursor:
+    async with read_pool.acquire() as db, db.cursor() as cursor:
         await cursor.execute(*script)
         res = await cursor.fetchone()
 
@@ -180,7 +179,7 @@ async def user_info(ctx: tanjun.abc.Context, user: hikari.User, player_info: Pla
 
 
 async def verification_routine(ctx: tanjun.abc.Context, member: hikari.Member, ign: str,
-                               config: Config, db: aiosqlite.Connection):
+                               config: Config):
 
 
     # Get user uuid & case sensitive ign
@@ -208,6 +207,12 @@ async def verification_routine(ctx: tanjun.abc.Context, member: hikari.Member, i
         await ctx.respond(embed=error_embed(res.status))
         return
 
+    # The cache is only an optimisation, failing to fill it must not fail the verification
+    try:
+        await UUIDCache().put(ign, uuid)
+    except Exception as exception:
+        await log_error(ctx, exception)
+
     # Remove all member roles
     roles = [role for role in list(member.role_ids) if
              role not in config['verify']['guild_member_roles'] and role != config['verify']['member_role_id']]
@@ -221,10 +226,9 @@ async def verification_routine(ctx: tanjun.abc.Context, member: hikari.Member, i
         assert res.status == 200, 'api.hypixel.net/player did not return a 200'
         player = (await res.json())['player']
 
-        # Fetch guild data
-        res = await get(f'https://api.hypixel.net/guild?key={key}&player={uuid}')
-        assert res.status == 200, "api.hypixel.net/guild did not return a 200"
-        guild = (await res.json())['guild']
+        # Fetch guild data. Live, since the guild decides the roles given
+        snapshot = await GuildSnapshots().get_player_guild(uuid, live=True)
+        guild = snapshot['guild'] if snapshot else None
 
     except Exception as exception:  # Log any errors that might araise
         await log_error(ctx, exception)
@@ -300,7 +304,7 @@ async def verification_routine(ctx: tanjun.abc.Context, member: hikari.Member, i
             color=config['colors']['error']
         )
 
-    await db.execute('''
+    await WriteBatcher().execute('''
             INSERT OR REPLACE INTO "USERS"(uuid, discord_id, ign, guild_uuid, created_at) 
             VALUES (:uuid, :discord_id, :ign, :guild_uuid, :created_at)
         ''', {
@@ -311,7 +315,6 @@ async def verification_routine(ctx: tanjun.abc.Context, member: hikari.Member, i
         "created_at": int(time.time())
     })
 
-    await db.commit()
 
     try:
         await member.edit(nickname=player["displayname"])
@@ -11,7 +11,8 @@ from colorama import Fore
 from dotenv import load_dotenv
 
 from utils.config.config import Config, ConfigHandler
-from utils.database.connection import DBConnection
+from utils.database import DBConnection, ReadPool
+from utils.http import HTTPClient
 
 from components.join_buttons import JoinButtons
 
@@ -123,19 +124,19 @@ client: tanjun.Client = tanjun.Client.from_gateway_bot(bot, declare_global_comma
 client.load_directory("./components")
 (
     tanjun.InMemoryConcurrencyLimiter()
-    .set_bucket("database_commands", tanjun.BucketResource.GLOBAL, 1)
     .disable_bucket("plugin.meta")
     .add_to_client(client)
 )
 (
     tanjun.InMemoryCooldownManager()
-    .set_bucket("api_commands", tanjun.BucketResource.GLOBAL, 60, 60)
+    .set_bucket("api_commands", tanjun.BucketResource.USER, 5, 60)
     .set_bucket("crisis", tanjun.BucketResource.GUILD, 1, 300)
     .set_bucket("spam", tanjun.BucketResource.USER, 1, 20)
     .disable_bucket("plugin.meta")
     .add_to_client(client)
 )
 client.set_type_dependency(aiosqlite.Connection, DBConnection().get_db())
+client.set_type_dependency(ReadPool, DBConnection().get_read_pool())
 client.set_type_dependency(Config, ConfigHandler().get_config())
 miru.install(bot)
 
@@ -146,12 +147,19 @@ miru.install(bot)
 
 @bot.listen(hikari.StartedEvent)
 async def on_started(_) -> None:
+    await HTTPClient().open_session()
+
     view = JoinButtons(ConfigHandler().get_config())
     await view.start()
 
     print(f'{Fore.YELLOW}{bot.get_me()} is ready')
 
 
+@bot.listen(hikari.StoppingEvent)
+async def on_stopping(_) -> None:
+    await HTTPClient().close_session()
+
+
 @bot.listen(hikari.GuildMessageCreateEvent)
 async def on_message(event: hikari.GuildMessageCreateEvent) -> None:
     if is_bridge_message(event.message, ConfigHandler().get_config()):
@@ -163,8 +171,8 @@ async def on_message(event: hikari.GuildMessageCreateEvent) -> None:
     if is_warn(event.message.content):
         await handle_warn(event, ConfigHandler().get_config())
 
-    if TriggersFileHandler().is_trigger(event.message.content):
-        await TriggersFileHandler().handle_trigger(event, ConfigHandler().get_config())
+    if (trigger := TriggersFileHandler().match(event.message.content)) is not None:
+        await TriggersFileHandler().handle_trigger(event, trigger, ConfigHandler().get_config())
 
 
 if __name__ == "__main__":
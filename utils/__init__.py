@@ -1,38 +1,42 @@
+import asyncio
 from random import random
 
-import aiohttp
 import tanjun
 
+from .singleton import Singleton
+from .locks import ResourceLocks
+from .http import HTTPClient, Priority, Response
+from .mojang import BulkUUIDResolver, MojangAPIError, UUIDCache
 
 profile_choices = ['apple', 'banana', 'blueberry', 'coconut', 'cucumber', 'grapes',
             'kiwi', 'lemon', 'lime', 'mango', 'orange', 'papaya', 'pear',
             'peach', 'pineapple', 'pomegranate', 'raspberry', 'strawberry',
             'tomato', 'watermelon', 'zucchini']
 
-class Singleton(type):
-    _instances = {}
 
-    def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
-        return cls._instances[cls]
+async def request(method: str, url: str, priority: Priority = Priority.INTERACTIVE,
+                  **kwargs) -> Response:
+    return await HTTPClient().request(method, url, priority, **kwargs)
 
 
-async def get(url) -> aiohttp.ClientResponse:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as res:
-            await res.read()
-        return res
+async def get(url, priority: Priority = Priority.INTERACTIVE, **kwargs) -> Response:
+    return await request('GET', url, priority, **kwargs)
 
 
 async def extract_uuid(ign: str) -> str | None:
-    uuid = None
+    if (entry := await UUIDCache().get(ign)) is not None:
+        return entry['uuid']
 
-    res = await get(f'https://api.mojang.com/users/profiles/minecraft/{ign}')
+    try:
+        # Resolved (and cached) in bulk together with any other lookup happening at the same time
+        return await BulkUUIDResolver().resolve(ign)
+    except MojangAPIError:
+        return None
 
-    if res.status == 200:
-        uuid = (await res.json())['id']
-    return uuid
+
+async def extract_uuids(igns: list[str]) -> dict[str, str | None]:
+    uuids = await asyncio.gather(*[extract_uuid(ign) for ign in igns])
+    return dict(zip(igns, uuids))
 
 
 async def trigger_typing(ctx: tanjun.abc.Context, defer: bool = False):
@@ -4,13 +4,14 @@ import hikari
 import tanjun
 
 from utils.config.config import ConfigHandler
+from utils.database import ReadPool
 
 config = ConfigHandler().get_config()
 
 
-async def registered_check(ctx: tanjun.abc.Context, db: alluka.Injected[aiosqlite.Connection]):
+async def registered_check(ctx: tanjun.abc.Context, read_pool: alluka.Injected[ReadPool]):
     cursor: aiosqlite.Cursor
-    async with db.cursor() as cursor:
+    async with read_pool.acquire() as db, db.cursor() as cursor:
         await cursor.execute('''
             SELECT COUNT(1), discord_id
             FROM "USERS"
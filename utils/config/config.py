@@ -13,6 +13,15 @@ class Colors(TypedDict):
     secondary: int | None
 
 
+class Database(TypedDict, total=False):
+    journal_mode: str
+    synchronous: str
+    mmap_size: int
+    cache_size: int
+    temp_store: str
+    read_connections: int
+
+
 class Crisis(TypedDict):
     ignored_categories: list[int]
     ignored_roles: list[int]
@@ -98,6 +107,8 @@ class ActivatedTasks(TypedDict):
     gtatsu: bool
     inactives_check: bool
     check_verified: bool
+    guild_snapshots: bool
+    inactive_reports: bool
 
 
 class Tasks(TypedDict):
@@ -105,6 +116,7 @@ class Tasks(TypedDict):
     total_members_channel_id: int
     booster_role_id: int
     booster_log_channel_id: int
+    guild_snapshot_ttl: int
 
 
 class Qotd(TypedDict):
@@ -148,6 +160,7 @@ class Config(TypedDict, total=False):
 
     guilds: dict[str, GuildInfo]
     colors: Colors
+    database: Database
     modules: dict[str, bool]
     crisis: Crisis
     files: Files
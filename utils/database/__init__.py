@@ -1,3 +1,8 @@
 from .connection import DBConnection
 from .converters import BannedMemberInfo, RepCommandInfo, SuggestionInfo, UserInfo, convert_to_banned, convert_to_rep, \
     convert_to_suggestion, convert_to_user
+from .migrations import MIGRATIONS, get_schema_version, migrate
+from .read_pool import ReadPool
+from .search import to_fts_query
+from .sequences import next_id
+from .write_batcher import WriteBatcher
@@ -2,22 +2,69 @@ import logging
 import aiosqlite
 
 from utils import Singleton
+from utils.config import ConfigHandler
 from colorama import Fore
 
+from .migrations import migrate
+from .read_pool import ReadPool
+
+DATABASE_PATH = './data/database.db'
+DEFAULT_READ_CONNECTIONS = 4  # Read-only connections opened next to the writer
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",  # Readers don't block the writer and commits don't rewrite the main file
+    "synchronous": "NORMAL",  # Only the WAL is synced on commit, safe in WAL mode
+    "mmap_size": 268435456,  # Bytes of the file read through memory mapping
+    "cache_size": -65536,  # Page cache size, negative values are in KiB
+    "temp_store": "MEMORY"  # Temp tables and indices used by sorts are kept in memory
+}
+
 
 class DBConnection(metaclass=Singleton):
     _con: aiosqlite.Connection
+    _read_pool: ReadPool
 
     def __init__(self):
         pass
 
     async def connect_db(self):
-        self._con = await aiosqlite.connect('./data/database.db')
+        self._con = await aiosqlite.connect(DATABASE_PATH)
+        await self._apply_pragmas()
+
+        for version in await migrate(self._con):
+            print(f'{Fore.YELLOW}Database migrated to version {version}')
+
+        await self._con.execute('PRAGMA optimize')
+
+        # Opened after the migrations so the readers see the final schema
+        pragmas = self._get_pragmas()
+        self._read_pool = await ReadPool.open(DATABASE_PATH,
+                                              int(pragmas.get('read_connections', DEFAULT_READ_CONNECTIONS)),
+                                              [f'PRAGMA mmap_size={int(pragmas["mmap_size"])}',
+                                               f'PRAGMA cache_size={int(pragmas["cache_size"])}',
+                                               f'PRAGMA temp_store={str(pragmas["temp_store"])}'])
         print(f'{Fore.YELLOW}Database connection established')
 
     async def close_db(self):
+        await self._read_pool.close()
         await self._con.close()
         print(f'{Fore.YELLOW}Database disconnected')
 
     def get_db(self):
         return self._con
+
+    def get_read_pool(self):
+        return self._read_pool
+
+    async def _apply_pragmas(self):
+        pragmas = self._get_pragmas()
+
+        await self._con.execute(f'PRAGMA journal_mode={str(pragmas["journal_mode"])}')
+        await self._con.execute(f'PRAGMA synchronous={str(pragmas["synchronous"])}')
+        await self._con.execute(f'PRAGMA mmap_size={int(pragmas["mmap_size"])}')
+        await self._con.execute(f'PRAGMA cache_size={int(pragmas["cache_size"])}')
+        await self._con.execute(f'PRAGMA temp_store={str(pragmas["temp_store"])}')
+
+    @staticmethod
+    def _get_pragmas() -> dict:
+        return {**DEFAULT_PRAGMAS, **ConfigHandler().get_config().get('database', {})}
@@ -0,0 +1,218 @@
+import aiosqlite
+
+# Each script brings the schema up one version, script N sets PRAGMA user_version to N + 1.
+# Scripts are only ever appended, a script that already ran on a live database must not be edited
+MIGRATIONS: list[str] = [
+    # 1: Baseline. The column order of the original tables is relied on by utils/database/converters.py
+    '''
+    CREATE TABLE IF NOT EXISTS "USERS" (
+        "uuid" TEXT PRIMARY KEY,
+        "discord_id" INTEGER,
+        "ign" TEXT,
+        "guild_uuid" TEXT,
+        "inactive_until" INTEGER,
+        "tatsu_score" INTEGER DEFAULT 0,
+        "created_at" INTEGER,
+        "last_week_tatsu" INTEGER DEFAULT 0,
+        "gtatsu" INTEGER DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS "REPUTATION" (
+        "rep_id" INTEGER PRIMARY KEY,
+        "receiver" INTEGER NOT NULL,
+        "provider" INTEGER NOT NULL,
+        "comments" TEXT,
+        "created_at" INTEGER,
+        "msg_id" INTEGER,
+        "type" INTEGER DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS "SUGGESTIONS" (
+        "suggestion_number" INTEGER PRIMARY KEY,
+        "message_id" INTEGER,
+        "author_id" INTEGER,
+        "suggestion" TEXT,
+        "answered" INTEGER DEFAULT 0,
+        "approved" INTEGER DEFAULT 0,
+        "reason" TEXT,
+        "approved_by" INTEGER,
+        "created_at" INTEGER,
+        "thread_id" INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS "BANNED" (
+        "uuid" TEXT PRIMARY KEY,
+        "reason" TEXT,
+        "moderator" INTEGER,
+        "created_at" INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS "UUID_CACHE" (
+        "ign" TEXT PRIMARY KEY,
+        "uuid" TEXT,
+        "fetched_at" INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS "PLAYER_ACTIVITY" (
+        "uuid" TEXT PRIMARY KEY,
+        "displayname" TEXT NOT NULL,
+        "last_login" INTEGER,
+        "fetched_at" INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS "INACTIVE_REPORTS" (
+        "guild_uuid" TEXT PRIMARY KEY,
+        "guild_name" TEXT NOT NULL,
+        "players" TEXT NOT NULL,
+        "created_at" INTEGER NOT NULL
+    );
+    ''',
+    # 2: Indexes on the columns filtered by constantly
+    '''
+    CREATE INDEX IF NOT EXISTS "USERS_discord_id" ON "USERS"(discord_id);
+    CREATE INDEX IF NOT EXISTS "USERS_guild_uuid" ON "USERS"(guild_uuid);
+    CREATE INDEX IF NOT EXISTS "USERS_inactive_until" ON "USERS"(inactive_until);
+    CREATE INDEX IF NOT EXISTS "REPUTATION_receiver_type" ON "REPUTATION"(receiver, type);
+    CREATE INDEX IF NOT EXISTS "SUGGESTIONS_author_id_answered" ON "SUGGESTIONS"(author_id, answered);
+    ''',
+    # 3: ID sequences, seeded from the IDs already handed out
+    '''
+    CREATE TABLE IF NOT EXISTS "SEQUENCES" (
+        "name" TEXT PRIMARY KEY,
+        "value" INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO "SEQUENCES"(name, value)
+    SELECT 'rep_id', COALESCE(max(rep_id), 0) FROM "REPUTATION";
+    INSERT OR IGNORE INTO "SEQUENCES"(name, value)
+    SELECT 'suggestion_number', COALESCE(max(suggestion_number), 0) FROM "SUGGESTIONS";
+    ''',
+    # 4: Rep counts per receiver and type, kept in sync with REPUTATION by triggers
+    '''
+    CREATE TABLE IF NOT EXISTS "REP_COUNTS" (
+        "receiver" INTEGER NOT NULL,
+        "type" INTEGER NOT NULL,
+        "count" INTEGER NOT NULL,
+        PRIMARY KEY ("receiver", "type")
+    ) WITHOUT ROWID;
+    INSERT OR REPLACE INTO "REP_COUNTS"(receiver, type, count)
+    SELECT receiver, type, COUNT(1) FROM "REPUTATION" GROUP BY receiver, type;
+
+    CREATE TRIGGER IF NOT EXISTS "REPUTATION_count_insert" AFTER INSERT ON "REPUTATION"
+    BEGIN
+        INSERT INTO "REP_COUNTS"(receiver, type, count) VALUES (new.receiver, new.type, 1)
+        ON CONFLICT(receiver, type) DO UPDATE SET count=count + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS "REPUTATION_count_delete" AFTER DELETE ON "REPUTATION"
+    BEGIN
+        UPDATE "REP_COUNTS" SET count=count - 1 WHERE receiver=old.receiver AND type=old.type;
+    END;
+    CREATE TRIGGER IF NOT EXISTS "REPUTATION_count_update" AFTER UPDATE OF receiver, type ON "REPUTATION"
+    BEGIN
+        UPDATE "REP_COUNTS" SET count=count - 1 WHERE receiver=old.receiver AND type=old.type;
+        INSERT INTO "REP_COUNTS"(receiver, type, count) VALUES (new.receiver, new.type, 1)
+        ON CONFLICT(receiver, type) DO UPDATE SET count=count + 1;
+    END;
+    ''',
+    # 5: Rep counts per type, day and receiver for the leaderboards, kept in sync with REPUTATION by triggers.
+    # A day is created_at // 86400, so a period's leaderboard only sums the rows of the days it spans
+    '''
+    CREATE TABLE IF NOT EXISTS "REP_DAILY" (
+        "type" INTEGER NOT NULL,
+        "day" INTEGER NOT NULL,
+        "receiver" INTEGER NOT NULL,
+        "count" INTEGER NOT NULL,
+        PRIMARY KEY ("type", "day", "receiver")
+    ) WITHOUT ROWID;
+    INSERT OR REPLACE INTO "REP_DAILY"(type, day, receiver, count)
+    SELECT type, COALESCE(created_at, 0) / 86400, receiver, COUNT(1) FROM "REPUTATION"
+    GROUP BY type, COALESCE(created_at, 0) / 86400, receiver;
+
+    CREATE INDEX IF NOT EXISTS "REP_COUNTS_type_count" ON "REP_COUNTS"(type, count DESC);
+
+    CREATE TRIGGER IF NOT EXISTS "REPUTATION_daily_insert" AFTER INSERT ON "REPUTATION"
+    BEGIN
+        INSERT INTO "REP_DAILY"(type, day, receiver, count)
+        VALUES (new.type, COALESCE(new.created_at, 0) / 86400, new.receiver, 1)
+        ON CONFLICT(type, day, receiver) DO UPDATE SET count=count + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS "REPUTATION_daily_delete" AFTER DELETE ON "REPUTATION"
+    BEGIN
+        DELETE FROM "REP_DAILY"
+        WHERE type=old.type AND day=COALESCE(old.created_at, 0) / 86400 AND receiver=old.receiver AND count <= 1;
+        UPDATE "REP_DAILY" SET count=count - 1
+        WHERE type=old.type AND day=COALESCE(old.created_at, 0) / 86400 AND receiver=old.receiver;
+    END;
+    CREATE TRIGGER IF NOT EXISTS "REPUTATION_daily_update" AFTER UPDATE OF receiver, type, created_at ON "REPUTATION"
+    BEGIN
+        DELETE FROM "REP_DAILY"
+        WHERE type=old.type AND day=COALESCE(old.created_at, 0) / 86400 AND receiver=old.receiver AND count <= 1;
+        UPDATE "REP_DAILY" SET count=count - 1
+        WHERE type=old.type AND day=COALESCE(old.created_at, 0) / 86400 AND receiver=old.receiver;
+        INSERT INTO "REP_DAILY"(type, day, receiver, count)
+        VALUES (new.type, COALESCE(new.created_at, 0) / 86400, new.receiver, 1)
+        ON CONFLICT(type, day, receiver) DO UPDATE SET count=count + 1;
+    END;
+    ''',
+    # 6: Full-text index over the suggestions' text, kept in sync with SUGGESTIONS by triggers.
+    # The index stores no copy of the text, it reads it from SUGGESTIONS by suggestion_number
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS "SUGGESTIONS_FTS" USING fts5(
+        suggestion,
+        content='SUGGESTIONS',
+        content_rowid='suggestion_number',
+        tokenize='porter unicode61'
+    );
+    INSERT INTO "SUGGESTIONS_FTS"("SUGGESTIONS_FTS") VALUES ('rebuild');
+
+    CREATE TRIGGER IF NOT EXISTS "SUGGESTIONS_fts_insert" AFTER INSERT ON "SUGGESTIONS"
+    BEGIN
+        INSERT INTO "SUGGESTIONS_FTS"(rowid, suggestion) VALUES (new.suggestion_number, new.suggestion);
+    END;
+    CREATE TRIGGER IF NOT EXISTS "SUGGESTIONS_fts_delete" AFTER DELETE ON "SUGGESTIONS"
+    BEGIN
+        INSERT INTO "SUGGESTIONS_FTS"("SUGGESTIONS_FTS", rowid, suggestion)
+        VALUES ('delete', old.suggestion_number, old.suggestion);
+    END;
+    CREATE TRIGGER IF NOT EXISTS "SUGGESTIONS_fts_update" AFTER UPDATE OF suggestion_number, suggestion ON "SUGGESTIONS"
+    BEGIN
+        INSERT INTO "SUGGESTIONS_FTS"("SUGGESTIONS_FTS", rowid, suggestion)
+        VALUES ('delete', old.suggestion_number, old.suggestion);
+        INSERT INTO "SUGGESTIONS_FTS"(rowid, suggestion) VALUES (new.suggestion_number, new.suggestion);
+    END;
+    '''
+]
+
+
+async def get_schema_version(db: aiosqlite.Connection) -> int:
+    cursor: aiosqlite.Cursor
+    async with db.cursor() as cursor:
+        await cursor.execute('PRAGMA user_version')
+        return (await cursor.fetchone())[0]
+
+
+async def migrate(db: aiosqlite.Connection) -> list[int]:
+    """
+    Applies every migration newer than the database's user_version, in order.
+    Each migration runs in its own transaction together with the version bump, so a failing
+    migration leaves the database at the last version that applied cleanly
+
+    :param db: The database connection
+    :return: The versions that were applied
+    :raise RuntimeError: If the database is newer than the latest migration
+    """
+
+    version = await get_schema_version(db)
+
+    if version > len(MIGRATIONS):
+        raise RuntimeError(f'Database schema version {version} is newer than the latest migration ({len(MIGRATIONS)})')
+
+    applied = []
+    for target, script in enumerate(MIGRATIONS[version:], start=version + 1):
+        try:
+            await db.executescript(f'''
+                BEGIN;
+                {script}
+                PRAGMA user_version={target};
+                COMMIT;
+            ''')
+        except Exception:
+            await db.rollback()
+            raise
+
+        applied.append(target)
+
+    return applied
@@ -0,0 +1,56 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import aiosqlite
+
+
+class ReadPool:
+    def __init__(self, connections: list[aiosqlite.Connection]):
+        self._connections = connections
+        self._idle: asyncio.Queue[aiosqlite.Connection] | None = None
+
+    @classmethod
+    async def open(cls, path: str, size: int, pragmas: list[str]) -> 'ReadPool':
+        """
+        Opens a pool of read-only connections. In WAL mode they read the last committed state
+        without waiting for the writer connection
+
+        :param path: Path of the database file
+        :param size: Number of connections
+        :param pragmas: PRAGMA statements run on every connection
+        :return: The pool
+        """
+
+        connections = []
+        for _ in range(size):
+            con = await aiosqlite.connect(f'file:{path}?mode=ro', uri=True)
+            for pragma in pragmas:
+                await con.execute(pragma)
+            connections.append(con)
+
+        return cls(connections)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Checks out a connection, waiting for one to be returned if they are all in use
+
+        :return: A read-only connection, returned to the pool on exit
+        """
+
+        # Created lazily so it binds to the loop the bot runs on, not the one the pool was opened in
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for con in self._connections:
+                self._idle.put_nowait(con)
+
+        con = await self._idle.get()
+        try:
+            yield con
+        finally:
+            self._idle.put_nowait(con)
+
+    async def close(self) -> None:
+        for con in self._connections:
+            await con.close()
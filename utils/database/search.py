@@ -0,0 +1,21 @@
+import re
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def to_fts_query(text: str, match_any: bool = False) -> str | None:
+    """
+    Turns free text into an FTS5 MATCH expression. Every word is quoted, so user input can't
+    be parsed as FTS5 syntax (AND, NEAR, column filters, unbalanced quotes, ...)
+
+    :param text: The text to search for
+    :param match_any: Whether rows matching any word qualify, instead of only rows matching every word
+    :return: The expression, or None if the text contains no words
+    """
+
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+
+    if not tokens:
+        return None
+
+    return (' OR ' if match_any else ' ').join(f'"{token}"' for token in dict.fromkeys(tokens))
@@ -0,0 +1,24 @@
+from .write_batcher import WriteBatcher
+
+
+async def next_id(sequence: str) -> int:
+    """
+    Allocates the next ID of a sequence of the SEQUENCES table. The increment is a single statement,
+    so concurrent callers always get different IDs. IDs of failed commands are not reused
+
+    :param sequence: The sequence's name, e.g. 'rep_id'
+    :return: The allocated ID
+    :raise LookupError: If the sequence doesn't exist
+    """
+
+    rows = await WriteBatcher().execute('''
+        UPDATE "SEQUENCES"
+        SET value=value + 1
+        WHERE name=:name
+        RETURNING value
+    ''', {"name": sequence})
+
+    if not rows:
+        raise LookupError(f'Sequence {sequence} does not exist')
+
+    return rows[0][0]
@@ -0,0 +1,128 @@
+import asyncio
+from typing import Any, Iterable
+
+import aiosqlite
+
+from utils.singleton import Singleton
+from .connection import DBConnection
+
+BATCH_WINDOW = 0.005  # Seconds to wait for more writes before committing a partial batch
+MAX_BATCH_SIZE = 64  # Writes committed in a single transaction at most
+
+_PendingWrite = tuple[str, Any, bool, asyncio.Future]  # (sql, parameters, is executemany, completion)
+
+
+class WriteBatcher(metaclass=Singleton):
+    def __init__(self):
+        self._pending: list[_PendingWrite] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._lock: asyncio.Lock | None = None
+
+    async def execute(self, sql: str, parameters: dict | None = None) -> list[aiosqlite.Row]:
+        """
+        Runs a write on the writer connection. Writes arriving within BATCH_WINDOW are committed
+        in a single transaction, each inside its own savepoint so a failing write doesn't undo the others
+
+        :param sql: The statement
+        :param parameters: The statement's parameters
+        :return: The rows returned by the statement, if it has a RETURNING clause
+        :raise sqlite3.Error: If the statement or the commit failed. The write was not applied
+        """
+
+        return await self._submit(sql, parameters if parameters is not None else {}, False)
+
+    async def executemany(self, sql: str, parameters: Iterable[dict]) -> None:
+        """
+        Runs a statement once per set of parameters, as a single write that is applied fully or not at all
+
+        :param sql: The statement
+        :param parameters: The parameters of each run
+        :return: None
+        :raise sqlite3.Error: If the statement or the commit failed. None of the runs were applied
+        """
+
+        await self._submit(sql, list(parameters), True)
+
+    async def checkpoint(self) -> None:
+        """
+        Moves the whole WAL into the database file and truncates it. Runs between batches,
+        a checkpoint can't run on the writer connection while it has a batch open
+
+        :return: None
+        :raise sqlite3.Error: If the checkpoint failed
+        """
+
+        async with self._get_lock():
+            await DBConnection().get_db().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Created lazily so it binds to the loop the bot runs on
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        return self._lock
+
+    async def _submit(self, sql: str, parameters: Any, many: bool) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((sql, parameters, many, future))
+
+        if len(self._pending) >= MAX_BATCH_SIZE:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(BATCH_WINDOW, self._flush)
+
+        # The write is committed even if the caller is cancelled
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+
+        task = asyncio.create_task(self._commit(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _commit(self, batch: list[_PendingWrite]) -> None:
+        db = DBConnection().get_db()
+        results = []
+
+        async with self._get_lock():
+            try:
+                # The savepoints nest inside this transaction. Outside of one, releasing a savepoint
+                # would commit it on its own
+                await db.execute('BEGIN')
+
+                for sql, parameters, many, _ in batch:
+                    await db.execute('SAVEPOINT batched_write')
+                    try:
+                        if many:
+                            await db.executemany(sql, parameters)
+                            results.append(None)
+                        else:
+                            async with db.execute(sql, parameters) as cursor:
+                                results.append(list(await cursor.fetchall()))
+                    except Exception as exception:
+                        await db.execute('ROLLBACK TO batched_write')
+                        results.append(exception)
+                    await db.execute('RELEASE batched_write')
+
+                await db.commit()
+
+            except Exception as exception:
+                # Nothing of the batch was committed. Writes that already failed keep their own error
+                await db.rollback()
+                results += [None] * (len(batch) - len(results))
+                results = [result if isinstance(result, Exception) else exception for result in results]
+
+        for (_, _, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -1,11 +1,10 @@
 import os
 import time
 
-import aiohttp
 import aiosqlite
 import hikari
 
-from utils import weighted_randint
+from utils import Priority, request, weighted_randint
 from utils.config import Config
 from utils.converters import to_player_info
 from utils.database import convert_to_user
@@ -66,8 +65,7 @@ def ensure_cooldown(ign: str) -> bool:
     return False if ign not in tatsu_dates else tatsu_dates[ign] + TATSU_CD > int(time.time())
 
 
-async def handle_tatsu(message: hikari.GuildMessageCreateEvent,
-                       db: aiosqlite.Connection = DBConnection().get_db()):
+async def handle_tatsu(message: hikari.GuildMessageCreateEvent):
     ign = message.embeds[0].author.name
 
     if not isinstance(ign, str):
@@ -86,7 +84,7 @@ async def handle_tatsu(message: hikari.GuildMessageCreateEvent,
         "uuid": player_info['uuid']
     })
     cursor: aiosqlite.Cursor
-    async with db.cursor() as cursor:
+    async with DBConnection().get_read_pool().acquire() as db, db.cursor() as cursor:
         await cursor.execute(*script)
         res = await cursor.fetchone()
 
@@ -98,13 +96,10 @@ async def handle_tatsu(message: hikari.GuildMessageCreateEvent,
         return
 
     tatsu_score = weighted_randint(12, 3)
-    session = aiohttp.ClientSession()
     headers = {'Content-Type': 'application/json', 'Authorization': os.getenv("tatsukey")}
     url = f'https://api.tatsu.gg/v1/guilds/{message.guild_id}/members/{user["discord_id"]}/score'
     json = {'action': 0, 'amount': tatsu_score}
 
-    r = await session.patch(url, headers=headers, json=json)
-    r.close()
-    await session.close()
+    await request('PATCH', url, Priority.BACKGROUND, headers=headers, json=json)
 
     tatsu_dates[ign] = int(time.time())
@@ -0,0 +1,3 @@
+from .client import HTTPClient
+from .ratelimit import Priority, RateLimiter
+from .response import Response
@@ -0,0 +1,117 @@
+import asyncio
+
+import aiohttp
+from colorama import Fore
+from yarl import URL
+
+from utils.singleton import Singleton
+from .ratelimit import Priority, RateLimiter, get_retry_after
+from .response import Response
+
+CONNECTION_LIMIT = 100  # Max open connections across all hosts
+CONNECTION_LIMIT_PER_HOST = 10  # Max open connections to a single host
+KEEPALIVE_TIMEOUT = 30  # Seconds an idle connection is kept in the pool
+DNS_CACHE_TTL = 300  # Seconds a resolved host is cached
+
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
+MAX_RATE_LIMIT_RETRIES = 3  # Times a 429 is queued again before it is returned to the caller
+
+
+class HTTPClient(metaclass=Singleton):
+    _session: aiohttp.ClientSession | None
+
+    def __init__(self):
+        self._session = None
+        self._closed = False  # Set by close_session(), the session is not reopened lazily after that
+        self._in_flight: dict[tuple[str, Priority], asyncio.Task] = {}  # (url, priority) -> GET in flight
+
+    async def open_session(self) -> aiohttp.ClientSession:
+        """
+        Opens the shared, connection-pooled session if it isn't already open
+        :return: The shared session
+        """
+
+        if self._session is None or self._session.closed:
+            self._session = self._make_session()
+            print(f'{Fore.YELLOW}HTTP session opened')
+
+        self._closed = False
+        return self._session
+
+    async def close_session(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            print(f'{Fore.YELLOW}HTTP session closed')
+
+        self._session = None
+        self._closed = True
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """
+        :return: The shared session, opened lazily since tasks may fire before StartedEvent
+        :raise RuntimeError: If the session was closed, a session opened during shutdown would never be closed
+        """
+
+        if self._closed:
+            raise RuntimeError('The HTTP session was closed')
+
+        if self._session is None or self._session.closed:
+            self._session = self._make_session()
+
+        return self._session
+
+    async def request(self, method: str, url: str, priority: Priority = Priority.INTERACTIVE,
+                      **kwargs) -> Response:
+        """
+        Sends a request through the shared session and reads the body so the connection is released back to the pool.
+        Requests wait for the upstream's rate limit budget, and rate limited ones are queued again.
+        Identical plain GETs of the same priority sent while one is already in flight share its response.
+
+        :param method: The HTTP method
+        :param url: The url to request
+        :param priority: Whether a member is waiting on this request or not
+        :param kwargs: Any other argument aiohttp.ClientSession.request() accepts
+        :return: The (already read) response
+        """
+
+        if method != 'GET' or kwargs:
+            return await self._send(method, url, priority, **kwargs)
+
+        # Keyed on the priority too, an interactive request must not wait in a background request's place
+        key = (url, priority)
+        if (task := self._in_flight.get(key)) is None:
+            task = self._in_flight[key] = asyncio.create_task(self._send(method, url, priority))
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # Shielded so one caller giving up doesn't cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _send(self, method: str, url: str, priority: Priority, **kwargs) -> Response:
+        host = URL(url).host
+
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            await RateLimiter().acquire(host, priority)
+
+            async with self.get_session().request(method, url, **kwargs) as res:
+                response = Response(res.url, res.status, res.headers, await res.read())
+
+            RateLimiter().update(host, response.status, response.headers)
+            if response.status != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                break
+
+            # Hosts with a bucket are held back by it, the others have to be backed off from here
+            if RateLimiter().get_bucket(host) is None:
+                await asyncio.sleep(get_retry_after(response.headers))
+
+        return response
+
+    @staticmethod
+    def _make_session() -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            limit_per_host=CONNECTION_LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL
+        )
+
+        return aiohttp.ClientSession(connector=connector, timeout=REQUEST_TIMEOUT, trust_env=True)
@@ -0,0 +1,141 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+
+from multidict import CIMultiDictProxy
+
+from utils.singleton import Singleton
+
+# Requests allowed per period (in seconds) for every upstream the bot talks to.
+# Hosts not listed here are not throttled.
+RATE_LIMITS: dict[str, tuple[int, float]] = {
+    'api.hypixel.net': (120, 60),
+    'api.mojang.com': (600, 600),
+    'sky.shiiyu.moe': (60, 60),
+    'api.slothpixel.me': (60, 60),
+    'api.tatsu.gg': (60, 60),
+}
+DEFAULT_RETRY_AFTER = 5  # Seconds to back off on a 429 that didn't say for how long
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # Commands a member is waiting on
+    BACKGROUND = 1  # Tasks and bulk lookups
+
+
+class TokenBucket:
+    def __init__(self, rate: int, period: float):
+        self.rate = rate
+        self.period = period
+        self.tokens = float(rate)
+        self.blocked_until = 0.0
+
+        self._updated_at = time.monotonic()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def acquire(self, priority: Priority) -> None:
+        """
+        Waits until a token is available. Waiters are served by priority, then in arrival order
+
+        :param priority: The priority of the request
+        :return: None
+        """
+
+        self._refill()
+        if not self._waiters and self.tokens >= 1 and time.monotonic() >= self.blocked_until:
+            self.tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self._release_waiters()
+
+        await future
+
+    def update(self, status: int, headers: CIMultiDictProxy[str]) -> None:
+        """
+        Syncs the bucket with the rate limit state reported by the upstream
+
+        :param status: The response status
+        :param headers: The response headers
+        :return: None
+        """
+
+        now = time.monotonic()
+
+        if (remaining := _to_float(headers.get('RateLimit-Remaining'))) is not None:
+            self.tokens = min(self.tokens, remaining)
+
+            if remaining < 1 and (reset := _to_float(headers.get('RateLimit-Reset'))) is not None:
+                self.blocked_until = max(self.blocked_until, now + reset)
+
+        if status == 429:
+            self.tokens = 0
+            self.blocked_until = max(self.blocked_until, now + get_retry_after(headers))
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(float(self.rate), self.tokens + (now - self._updated_at) * self.rate / self.period)
+        self._updated_at = now
+
+    def _release_waiters(self) -> None:
+        self._refill()
+        now = time.monotonic()
+
+        while self._waiters and self.tokens >= 1 and now >= self.blocked_until:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():  # Waiter was cancelled
+                continue
+
+            self.tokens -= 1
+            future.set_result(None)
+
+        if self._waiters and self._timer is None:
+            delay = max(self.blocked_until - now, (1 - self.tokens) * self.period / self.rate, 0)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._release_waiters()
+
+
+class RateLimiter(metaclass=Singleton):
+    def __init__(self):
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def get_bucket(self, host: str | None) -> TokenBucket | None:
+        if host not in RATE_LIMITS:
+            return None
+
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(*RATE_LIMITS[host])
+
+        return self._buckets[host]
+
+    async def acquire(self, host: str | None, priority: Priority = Priority.INTERACTIVE) -> None:
+        if (bucket := self.get_bucket(host)) is not None:
+            await bucket.acquire(priority)
+
+    def update(self, host: str | None, status: int, headers: CIMultiDictProxy[str]) -> None:
+        if (bucket := self.get_bucket(host)) is not None:
+            bucket.update(status, headers)
+
+
+def get_retry_after(headers: CIMultiDictProxy[str]) -> float:
+    """
+    :param headers: The headers of a 429 response
+    :return: Seconds to wait before retrying, DEFAULT_RETRY_AFTER if the response didn't say
+    """
+
+    return _to_float(headers.get('Retry-After')) or _to_float(headers.get('RateLimit-Reset')) or DEFAULT_RETRY_AFTER
+
+
+def _to_float(value: str | None) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
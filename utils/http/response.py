@@ -0,0 +1,33 @@
+import json
+from typing import Any
+
+from multidict import CIMultiDictProxy
+from yarl import URL
+
+
+class Response:
+    """
+    A fully read response. Coalesced requests hand the same instance to every caller,
+    so the body is parsed only once and the parsed JSON must not be mutated
+    """
+
+    _MISSING = object()
+
+    def __init__(self, url: URL, status: int, headers: CIMultiDictProxy[str], body: bytes):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self._body = body
+        self._json = Response._MISSING
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: str = 'utf-8') -> str:
+        return self._body.decode(encoding)
+
+    async def json(self) -> Any:
+        if self._json is Response._MISSING:
+            self._json = json.loads(self._body)
+
+        return self._json
@@ -0,0 +1,3 @@
+from .guilds import GuildSnapshot, GuildSnapshots, HypixelAPIError
+from .activity import PlayerActivity, fetch_activities, fetch_player_activity, is_active
+from .reports import InactivityReport, build_report, load_report, save_report
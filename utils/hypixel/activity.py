@@ -0,0 +1,134 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, TypedDict
+
+import aiosqlite
+
+from utils.database.connection import DBConnection
+from utils.database.write_batcher import WriteBatcher
+from utils.http import HTTPClient, Priority
+from .guilds import HypixelAPIError
+
+MAX_CONCURRENT_LOOKUPS = 10  # Player lookups in flight at once, the rate limiter still paces them
+ACTIVITY_TTL = 43200  # Seconds a cached last login is trusted
+INACTIVITY_PERIOD = 604800  # Seconds without logging in after which a player counts as inactive
+
+api_key = os.getenv('APIKEY')
+
+
+class PlayerActivity(TypedDict):
+    uuid: str
+    displayname: str
+    last_login: int | None  # Milliseconds since epoch, None if the player hides it
+
+
+async def fetch_player_activity(uuid: str, priority: Priority = Priority.INTERACTIVE) -> PlayerActivity:
+    """
+    Fetches a player's last login from the API
+
+    :param uuid: The player's UUID
+    :param priority: Priority of the request
+    :return: The player's activity
+    :raise HypixelAPIError: If the API did not return a 200
+    :raise LookupError: If the player does not exist
+    """
+
+    res = await HTTPClient().request('GET', f'https://api.hypixel.net/player?key={api_key}&uuid={uuid}', priority)
+    if res.status != 200:
+        raise HypixelAPIError('player', res.status)
+
+    if (player := (await res.json())['player']) is None:
+        raise LookupError(f'Player with UUID {uuid} not found')
+
+    return {
+        "uuid": uuid,
+        "displayname": player['displayname'],
+        "last_login": player.get('lastLogin')
+    }
+
+
+def is_active(activity: PlayerActivity) -> bool:
+    return activity['last_login'] is not None and (activity['last_login'] / 1000) + INACTIVITY_PERIOD > time.time()
+
+
+async def fetch_activities(uuids: list[str],
+                           on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+                           priority: Priority = Priority.BACKGROUND) -> list[PlayerActivity | Exception]:
+    """
+    Fetches the activity of many players. Players cached in the PLAYER_ACTIVITY table are only fetched again
+    if their cached data is stale, the rest are fetched concurrently, at most MAX_CONCURRENT_LOOKUPS at a time
+
+    :param uuids: The players' UUIDs
+    :param on_progress: Called with (done, total) every time a batch of lookups completes
+    :param priority: Priority of the requests
+    :return: The activity of each player, or the exception its lookup raised, in the same order as uuids
+    """
+
+    cached = await _load_cached_activities(uuids)
+    stale = [uuid for uuid in uuids if uuid not in cached]
+
+    fetched = dict(zip(stale, await _fetch_concurrently(stale, on_progress, priority)))
+    await _save_activities([activity for activity in fetched.values() if not isinstance(activity, Exception)])
+
+    return [cached[uuid] if uuid in cached else fetched[uuid] for uuid in uuids]
+
+
+async def _load_cached_activities(uuids: list[str]) -> dict[str, PlayerActivity]:
+    if not uuids:
+        return {}
+
+    cursor: aiosqlite.Cursor
+    async with DBConnection().get_read_pool().acquire() as db, db.cursor() as cursor:
+        await cursor.execute(f'''
+            SELECT uuid, displayname, last_login, fetched_at
+            FROM "PLAYER_ACTIVITY"
+            WHERE uuid IN ({', '.join('?' * len(uuids))})
+        ''', uuids)
+        rows = await cursor.fetchall()
+
+    cached = {}
+    for uuid, displayname, last_login, fetched_at in rows:
+        activity: PlayerActivity = {"uuid": uuid, "displayname": displayname, "last_login": last_login}
+
+        # A last login only moves forward, so a player seen active is still active until the period runs out
+        if is_active(activity) or fetched_at + ACTIVITY_TTL > time.time():
+            cached[uuid] = activity
+
+    return cached
+
+
+async def _save_activities(activities: list[PlayerActivity]) -> None:
+    if not activities:
+        return
+
+    fetched_at = int(time.time())
+    await WriteBatcher().executemany('''
+        INSERT OR REPLACE INTO "PLAYER_ACTIVITY"(uuid, displayname, last_login, fetched_at)
+        VALUES (:uuid, :displayname, :last_login, :fetched_at)
+    ''', [{**activity, "fetched_at": fetched_at} for activity in activities])
+
+
+async def _fetch_concurrently(uuids: list[str],
+                              on_progress: Callable[[int, int], Awaitable[None]] | None,
+                              priority: Priority) -> list[PlayerActivity | Exception]:
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_LOOKUPS)
+
+    async def lookup(uuid: str) -> PlayerActivity:
+        async with semaphore:
+            return await fetch_player_activity(uuid, priority)
+
+    tasks = [asyncio.create_task(lookup(uuid)) for uuid in uuids]
+
+    done = 0
+    for future in asyncio.as_completed(tasks):
+        try:
+            await future
+        except Exception:
+            pass  # Collected below, in order
+
+        done += 1
+        if on_progress is not None and done % MAX_CONCURRENT_LOOKUPS == 0 and done < len(tasks):
+            await on_progress(done, len(tasks))
+
+    return [task.exception() or task.result() for task in tasks]
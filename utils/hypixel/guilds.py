@@ -0,0 +1,122 @@
+import os
+import time
+from typing import Any, TypedDict
+
+from utils.config import ConfigHandler
+from utils.http import HTTPClient, Priority
+from utils.singleton import Singleton
+
+DEFAULT_SNAPSHOT_TTL = 3600  # Seconds a guild snapshot is considered fresh
+
+api_key = os.getenv('APIKEY')
+
+
+class HypixelAPIError(Exception):
+    def __init__(self, endpoint: str, status: int):
+        self.endpoint = endpoint
+        self.status = status
+        super().__init__(f'api.hypixel.net/{endpoint} returned a {status}')
+
+
+class GuildSnapshot(TypedDict):
+    guild: dict[str, Any]  # The guild object as returned by the API
+    member_uuids: frozenset[str]
+    fetched_at: float
+
+
+class GuildSnapshots(metaclass=Singleton):
+    def __init__(self):
+        self._snapshots: dict[str, GuildSnapshot] = {}
+
+    async def get_guild(self, guild_id: str, max_age: float | None = None,
+                        priority: Priority = Priority.INTERACTIVE) -> GuildSnapshot | None:
+        """
+        Returns the snapshot of a guild, fetching it if it's older than max_age
+
+        :param guild_id: The guild's ID
+        :param max_age: Max age in seconds of the snapshot. Defaults to the configured freshness window
+        :param priority: Priority of the request if the guild needs to be fetched
+        :return: The guild snapshot, None if the guild doesn't exist
+        :raise HypixelAPIError: If the API did not return a 200
+        """
+
+        if (snapshot := self._snapshots.get(guild_id)) is not None and self._is_fresh(snapshot, max_age):
+            return snapshot
+
+        return await self.refresh(guild_id, priority)
+
+    async def get_player_guild(self, uuid: str, max_age: float | None = None,
+                               priority: Priority = Priority.INTERACTIVE, live: bool = False) -> GuildSnapshot | None:
+        """
+        Returns the snapshot of the guild a player is in. Fresh snapshots are checked first,
+        the API is only queried if the player isn't in any of them
+
+        :param uuid: The player's UUID
+        :param max_age: Max age in seconds of the snapshots. Defaults to the configured freshness window
+        :param priority: Priority of the request if the guild needs to be fetched
+        :param live: Whether to skip the snapshots and always query the API. Use it for anything that grants roles,
+        a snapshot may still list a player who left the guild since
+        :return: The guild snapshot, None if the player is not in a guild
+        :raise HypixelAPIError: If the API did not return a 200
+        """
+
+        if not live:
+            for snapshot in self._snapshots.values():
+                if uuid in snapshot['member_uuids'] and self._is_fresh(snapshot, max_age):
+                    return snapshot
+
+        res = await HTTPClient().request('GET', f'https://api.hypixel.net/guild?key={api_key}&player={uuid}',
+                                         priority)
+        if res.status != 200:
+            raise HypixelAPIError('guild', res.status)
+
+        return self._store((await res.json())['guild'])
+
+    async def refresh(self, guild_id: str, priority: Priority = Priority.INTERACTIVE) -> GuildSnapshot | None:
+        res = await HTTPClient().request('GET', f'https://api.hypixel.net/guild?key={api_key}&id={guild_id}',
+                                         priority)
+        if res.status != 200:
+            raise HypixelAPIError('guild', res.status)
+
+        if (guild := (await res.json())['guild']) is None:
+            self._snapshots.pop(guild_id, None)
+            return None
+
+        return self._store(guild)
+
+    async def refresh_all(self, priority: Priority = Priority.BACKGROUND) -> list[Exception]:
+        """
+        Refreshes the snapshots of every configured guild. A guild failing doesn't stop the others
+
+        :param priority: Priority of the requests
+        :return: The errors of the guilds that failed
+        """
+
+        errors = []
+        for guild_info in ConfigHandler().get_config()['guilds'].values():
+            try:
+                await self.refresh(guild_info['guild_uuid'], priority)
+            except Exception as exception:
+                errors.append(exception)
+
+        return errors
+
+    def _store(self, guild: dict[str, Any] | None) -> GuildSnapshot | None:
+        if guild is None:
+            return None
+
+        snapshot: GuildSnapshot = {
+            "guild": guild,
+            "member_uuids": frozenset(member['uuid'] for member in guild['members']),
+            "fetched_at": time.time()
+        }
+        self._snapshots[guild['_id']] = snapshot
+
+        return snapshot
+
+    @staticmethod
+    def _is_fresh(snapshot: GuildSnapshot, max_age: float | None) -> bool:
+        if max_age is None:
+            max_age = ConfigHandler().get_config()['tasks'].get('guild_snapshot_ttl', DEFAULT_SNAPSHOT_TTL)
+
+        return snapshot['fetched_at'] + max_age > time.time()
@@ -0,0 +1,107 @@
+import json
+import time
+from typing import Awaitable, Callable, TypedDict
+
+import aiosqlite
+
+from utils.config import ConfigHandler
+from utils.database.connection import DBConnection
+from utils.database.write_batcher import WriteBatcher
+from utils.http import Priority
+from .activity import fetch_activities, is_active
+from .guilds import GuildSnapshots
+
+NEW_MEMBER_PERIOD = 604800  # Seconds after joining during which a member is never reported
+
+
+class InactivityReport(TypedDict):
+    guild_uuid: str
+    guild_name: str
+    players: list[str]  # IGNs of the inactive members, or their UUIDs if their lookup failed
+    created_at: int
+
+
+async def build_report(guild_uuid: str,
+                       on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+                       priority: Priority = Priority.BACKGROUND) -> tuple[InactivityReport | None, list[Exception]]:
+    """
+    Finds the inactive members of a guild
+
+    :param guild_uuid: The guild's ID
+    :param on_progress: Called with (done, total) every time a batch of player lookups completes
+    :param priority: Priority of the requests
+    :return: The report (None if the guild doesn't exist) and the exceptions raised by failed player lookups
+    :raise HypixelAPIError: If the guild could not be fetched
+    """
+
+    if (snapshot := await GuildSnapshots().get_guild(guild_uuid, priority=priority)) is None:
+        return None, []
+
+    cursor: aiosqlite.Cursor
+    async with DBConnection().get_read_pool().acquire() as db, db.cursor() as cursor:
+        await cursor.execute('''
+            SELECT uuid
+            FROM "USERS"
+            WHERE inactive_until IS NOT null
+        ''')
+        inactives_uuids = {row[0] for row in await cursor.fetchall()}
+
+    min_gexp = ConfigHandler().get_config()['min_gexp']
+
+    candidates = []  # UUIDs of the members whose last login needs to be checked
+    for player in snapshot['guild']['members']:
+        # Skip new members, members with an inactivity notice and members over the GEXP requirement
+        if (time.time() - (player['joined'] / 1000)) < NEW_MEMBER_PERIOD:
+            continue
+        if player['uuid'] in inactives_uuids:
+            continue
+        if sum(player['expHistory'].values()) > min_gexp:
+            continue
+
+        candidates.append(player['uuid'])
+
+    players = []
+    errors = []
+    for uuid, activity in zip(candidates, await fetch_activities(candidates, on_progress, priority)):
+        if isinstance(activity, Exception):
+            errors.append(activity)
+            players.append(uuid)
+        elif not is_active(activity):
+            players.append(activity['displayname'])
+
+    report: InactivityReport = {
+        "guild_uuid": guild_uuid,
+        "guild_name": snapshot['guild']['name'],
+        "players": players,
+        "created_at": int(time.time())
+    }
+
+    return report, errors
+
+
+async def save_report(report: InactivityReport) -> None:
+    await WriteBatcher().execute('''
+        INSERT OR REPLACE INTO "INACTIVE_REPORTS"(guild_uuid, guild_name, players, created_at)
+        VALUES (:guild_uuid, :guild_name, :players, :created_at)
+    ''', {**report, "players": json.dumps(report['players'])})
+
+
+async def load_report(guild_uuid: str) -> InactivityReport | None:
+    cursor: aiosqlite.Cursor
+    async with DBConnection().get_read_pool().acquire() as db, db.cursor() as cursor:
+        await cursor.execute('''
+            SELECT guild_uuid, guild_name, players, created_at
+            FROM "INACTIVE_REPORTS"
+            WHERE guild_uuid=:guild_uuid
+        ''', {"guild_uuid": guild_uuid})
+        res = await cursor.fetchone()
+
+    if res is None:
+        return None
+
+    return {
+        "guild_uuid": res[0],
+        "guild_name": res[1],
+        "players": json.loads(res[2]),
+        "created_at": res[3]
+    }
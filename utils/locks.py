@@ -0,0 +1,49 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Hashable
+
+from .singleton import Singleton
+
+
+class ResourceLocks(metaclass=Singleton):
+    def __init__(self):
+        self._locks: dict[Hashable, asyncio.Lock] = {}
+        self._holders: dict[Hashable, int] = {}  # Tasks holding or waiting for each lock
+
+    @asynccontextmanager
+    async def hold(self, *keys: Hashable) -> AsyncIterator[None]:
+        """
+        Holds the locks of the given resources, e.g. ('member', member_id) or ('suggestion', number).
+        Only operations on the same resources wait for each other. Locks are acquired in a fixed order,
+        so operations holding overlapping sets of resources can't deadlock
+
+        :param keys: The resources to lock
+        :return: None
+        """
+
+        ordered = sorted(set(keys), key=repr)
+
+        for key in ordered:
+            if key not in self._locks:
+                self._locks[key] = asyncio.Lock()
+                self._holders[key] = 0
+            self._holders[key] += 1
+
+        acquired = []
+        try:
+            for key in ordered:
+                await self._locks[key].acquire()
+                acquired.append(key)
+
+            yield
+
+        finally:
+            for key in reversed(acquired):
+                self._locks[key].release()
+
+            # Forget locks nobody is using so the dict doesn't grow with every member ever locked
+            for key in ordered:
+                self._holders[key] -= 1
+                if self._holders[key] == 0:
+                    del self._holders[key]
+                    del self._locks[key]
@@ -0,0 +1,2 @@
+from .uuid_cache import CacheEntry, UUIDCache, UUIDCacheStats
+from .resolver import BulkUUIDResolver, MojangAPIError
@@ -0,0 +1,92 @@
+import asyncio
+import re
+
+from colorama import Fore
+
+from utils.error_utils import exception_to_string
+from utils.http import HTTPClient
+from utils.singleton import Singleton
+from .uuid_cache import UUIDCache
+
+BULK_ENDPOINT = 'https://api.mojang.com/profiles/minecraft'
+BATCH_SIZE = 10  # Max names Mojang accepts per bulk request
+BATCH_WINDOW = 0.05  # Seconds to wait for more names before sending a partial batch
+
+IGN_PATTERN = re.compile(r'^\w{1,16}$', re.ASCII)
+
+
+class MojangAPIError(Exception):
+    pass
+
+
+class BulkUUIDResolver(metaclass=Singleton):
+    def __init__(self):
+        self._pending: dict[str, asyncio.Future] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def resolve(self, ign: str) -> str | None:
+        """
+        Resolves an IGN through the bulk endpoint. Lookups arriving within BATCH_WINDOW share one request
+
+        :param ign: The IGN to resolve
+        :return: The UUID of the IGN, None if it doesn't exist
+        :raise MojangAPIError: If the bulk request failed
+        """
+
+        # One invalid name makes Mojang reject the whole batch
+        if not IGN_PATTERN.match(ign):
+            return None
+
+        key = ign.lower()
+
+        if (future := self._pending.get(key)) is None:
+            future = self._pending[key] = asyncio.get_running_loop().create_future()
+
+            if len(self._pending) >= BATCH_SIZE:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(BATCH_WINDOW, self._flush)
+
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, {}
+
+        task = asyncio.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        # Lookup errors reach the callers through their futures, this only sees failures after that,
+        # like the cache write. There is no command context to log them to the log channel with
+        if not task.cancelled() and (exception := task.exception()) is not None:
+            print(f'{Fore.RED}{exception_to_string("bulk UUID resolution", exception)}')
+
+    @staticmethod
+    async def _send(batch: dict[str, asyncio.Future]) -> None:
+        try:
+            res = await HTTPClient().request('POST', BULK_ENDPOINT, json=list(batch.keys()))
+            if res.status != 200:
+                raise MojangAPIError(f'Bulk profile lookup returned a {res.status}')
+
+            found = {profile['name'].lower(): profile['id'] for profile in await res.json()}
+            resolved = {key: found.get(key) for key in batch.keys()}
+
+        except Exception as exception:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exception)
+            return
+
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(resolved[key])
+
+        await UUIDCache().put_many(resolved)
@@ -0,0 +1,116 @@
+import time
+from collections import OrderedDict
+from typing import TypedDict
+
+import aiosqlite
+
+from utils.database.connection import DBConnection
+from utils.database.write_batcher import WriteBatcher
+from utils.singleton import Singleton
+
+CACHE_SIZE = 4096  # Max IGNs kept in memory
+CACHE_TTL = 86400  # Seconds a resolved IGN is trusted
+NEGATIVE_CACHE_TTL = 3600  # Seconds an unknown IGN is remembered as unknown
+
+
+class CacheEntry(TypedDict):
+    uuid: str | None  # None if the IGN doesn't belong to any account
+    fetched_at: int
+
+
+class UUIDCacheStats(TypedDict):
+    size: int
+    hits: int
+    db_hits: int
+    misses: int
+
+
+class UUIDCache(metaclass=Singleton):
+    def __init__(self):
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self.hits = 0  # Served from memory
+        self.db_hits = 0  # Served from the UUID_CACHE table
+        self.misses = 0  # Had to be resolved through the API
+
+    async def get(self, ign: str) -> CacheEntry | None:
+        """
+        Looks up an IGN in memory, then in the UUID_CACHE table
+
+        :param ign: The IGN to look up
+        :return: The cached entry, or None if the IGN must be resolved through the API
+        """
+
+        key = ign.lower()
+
+        if (entry := self._entries.get(key)) is not None and self._is_fresh(entry):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        cursor: aiosqlite.Cursor
+        async with DBConnection().get_read_pool().acquire() as db, db.cursor() as cursor:
+            await cursor.execute('''
+                SELECT uuid, fetched_at
+                FROM "UUID_CACHE"
+                WHERE ign=:ign
+            ''', {"ign": key})
+            res = await cursor.fetchone()
+
+        if res is not None and self._is_fresh(entry := {"uuid": res[0], "fetched_at": res[1]}):
+            self._remember(key, entry)
+            self.db_hits += 1
+            return entry
+
+        self.misses += 1
+        return None
+
+    async def put(self, ign: str, uuid: str | None) -> None:
+        """
+        Stores the result of an IGN resolution in memory and in the UUID_CACHE table
+
+        :param ign: The resolved IGN
+        :param uuid: The UUID of the IGN, None if the IGN doesn't exist
+        :return: None
+        """
+
+        await self.put_many({ign: uuid})
+
+    async def put_many(self, resolved: dict[str, str | None]) -> None:
+        """
+        Stores the results of several IGN resolutions in memory and in the UUID_CACHE table
+
+        :param resolved: The resolved IGNs mapped to their UUID (None if the IGN doesn't exist)
+        :return: None
+        """
+
+        fetched_at = int(time.time())
+        rows = []
+        for ign, uuid in resolved.items():
+            key = ign.lower()
+            self._remember(key, {"uuid": uuid, "fetched_at": fetched_at})
+            rows.append({"ign": key, "uuid": uuid, "fetched_at": fetched_at})
+
+        await WriteBatcher().executemany('''
+            INSERT OR REPLACE INTO "UUID_CACHE"(ign, uuid, fetched_at)
+            VALUES (:ign, :uuid, :fetched_at)
+        ''', rows)
+
+    def stats(self) -> UUIDCacheStats:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses
+        }
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > CACHE_SIZE:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _is_fresh(entry: CacheEntry) -> bool:
+        ttl = CACHE_TTL if entry['uuid'] is not None else NEGATIVE_CACHE_TTL
+        return entry['fetched_at'] + ttl > time.time()
@@ -0,0 +1,97 @@
+from typing import Any, Awaitable, Callable
+
+import aiosqlite
+import hikari
+import miru
+from miru.ext import nav
+
+from utils.database import ReadPool
+
+PAGE_SIZE = 10  # Rows shown per page
+
+
+class LazyNavigatorView(nav.NavigatorView):
+    def __init__(self, *, page_count: int, build_page: Callable[[int], Awaitable[hikari.Embed]], **kwargs):
+        """
+        A navigator whose pages are only built the first time they are shown
+
+        :param page_count: Number of pages
+        :param build_page: Builds the page with the given index
+        :param kwargs: Passed to NavigatorView
+        """
+
+        super().__init__(pages=[None] * page_count, **kwargs)
+        self._build_page = build_page
+
+    async def send_page(self, context: miru.Context, page_index: int | None = None) -> None:
+        if page_index is not None:
+            self.current_page = page_index
+
+        await self._ensure_page(self.current_page)
+        await super().send_page(context)
+
+    async def send(self, to, *, start_at: int = 0, **kwargs) -> None:
+        await self._ensure_page(start_at)
+        await super().send(to, start_at=start_at, **kwargs)
+
+    async def _ensure_page(self, index: int) -> None:
+        if self._pages[index] is None:
+            self._pages[index] = await self._build_page(index)
+
+
+class KeysetPages:
+    def __init__(self, read_pool: ReadPool, query: str, parameters: dict[str, Any], key: str,
+                 descending: bool = False):
+        """
+        Fetches the rows of a query one page at a time. A page following an already fetched page
+        continues after that page's last key, so its cost doesn't grow with the page number.
+        Pages reached by jumping (e.g. to the last page) fall back to OFFSET
+
+        :param read_pool: The pool the queries run on
+        :param query: The query to paginate, without ORDER BY or LIMIT
+        :param parameters: The query's parameters
+        :param key: Unique column of the query the rows are ordered by
+        :param descending: Whether the rows are ordered by descending key
+        """
+
+        self._read_pool = read_pool
+        self._query = query
+        self._parameters = parameters
+        self._key = key
+        self._descending = descending
+        self._last_keys: dict[int, Any] = {}  # Page index -> key of its last row
+        self._count: int | None = None
+
+    async def count(self) -> int:
+        if self._count is None:
+            cursor: aiosqlite.Cursor
+            async with self._read_pool.acquire() as db, db.cursor() as cursor:
+                await cursor.execute(f'SELECT COUNT(1) FROM ({self._query})', self._parameters)
+                self._count = (await cursor.fetchone())[0]
+
+        return self._count
+
+    async def fetch(self, index: int) -> list[aiosqlite.Row]:
+        order = 'DESC' if self._descending else 'ASC'
+        parameters = {**self._parameters, "page_size": PAGE_SIZE}
+
+        if index == 0:
+            script = f'SELECT * FROM ({self._query}) ORDER BY {self._key} {order} LIMIT :page_size'
+        elif index - 1 in self._last_keys:
+            script = (f'SELECT * FROM ({self._query}) WHERE {self._key} {"<" if self._descending else ">"} :after '
+                      f'ORDER BY {self._key} {order} LIMIT :page_size')
+            parameters['after'] = self._last_keys[index - 1]
+        else:
+            script = f'SELECT * FROM ({self._query}) ORDER BY {self._key} {order} LIMIT :page_size OFFSET :offset'
+            parameters['offset'] = index * PAGE_SIZE
+
+        cursor: aiosqlite.Cursor
+        async with self._read_pool.acquire() as db, db.cursor() as cursor:
+            await cursor.execute(script, parameters)
+            rows = list(await cursor.fetchall())
+            key_index = [column[0] for column in cursor.description].index(self._key)
+
+        if rows:
+            self._last_keys[index] = rows[-1][key_index]
+
+        return rows
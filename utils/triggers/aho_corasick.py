@@ -0,0 +1,70 @@
+from collections import deque
+from typing import Generic, Iterator, TypeVar
+
+V = TypeVar('V')
+
+
+class AhoCorasick(Generic[V]):
+    def __init__(self, patterns: dict[str, V]):
+        """
+        An automaton finding every occurrence of any of the patterns in a single pass over a text,
+        however many patterns there are
+
+        :param patterns: Pattern -> value reported when the pattern is found
+        """
+
+        self._goto: list[dict[str, int]] = [{}]  # State -> character -> next state
+        self._fail: list[int] = [0]  # State -> state of the longest proper suffix that is also a prefix
+        self._output: list[list[tuple[int, V]]] = [[]]  # State -> (length, value) of the patterns ending there
+
+        for pattern, value in patterns.items():
+            if pattern:
+                self._add(pattern, value)
+
+        self._link()
+
+    def _add(self, pattern: str, value: V) -> None:
+        state = 0
+        for char in pattern:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+
+        self._output[state].append((len(pattern), value))
+
+    def _link(self) -> None:
+        # Breadth first, so the fail state of a state's parent is always linked before the state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+
+                # A state also ends every pattern its fail state ends
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> Iterator[tuple[int, int, V]]:
+        """
+        Finds the occurrences of the patterns in a text, in the order they end
+
+        :param text: The text to search
+        :return: The start index, end index (exclusive) and value of every occurrence
+        """
+
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for end, char in enumerate(text, start=1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for length, value in output[state]:
+                yield end - length, end, value
@@ -1,17 +1,30 @@
 import json
 from random import choice
-from typing import List, TypedDict
+from typing import List, NotRequired, Tuple, TypedDict
 
 import hikari
 
 from utils import Singleton
 from utils.config import Config
+from .aho_corasick import AhoCorasick
+
+MATCH_EXACT = 'exact'  # Fires on a message that is the trigger
+MATCH_CONTAINS = 'contains'  # Fires on a message containing the trigger anywhere
+MATCH_WORD = 'word'  # Fires on a message containing the trigger as whole words
 
 
 class TriggerInfo(TypedDict):
     owner: List[int]
     reply: str | List[str]
     enabled: bool
+    match: NotRequired[str]  # One of the MATCH_ constants, MATCH_EXACT if missing
+
+
+class CompiledTrigger(TypedDict):
+    key: str
+    owners: frozenset[int]
+    replies: Tuple[str, ...]
+    match: str
 
 
 class TriggersFileHandler(metaclass=Singleton):
@@ -19,6 +32,9 @@ class TriggersFileHandler(metaclass=Singleton):
 
     def __init__(self):
         self._triggers = {}
+        self._index: dict[str, CompiledTrigger] = {}  # Uppercased key -> enabled exact trigger
+        self._key_lengths: frozenset[int] = frozenset()  # Lengths of the enabled exact triggers' keys
+        self._automaton: AhoCorasick[CompiledTrigger] | None = None  # Enabled contains and word triggers
 
     def get_triggers(self) -> dict:
         return self._triggers
@@ -32,6 +48,38 @@ class TriggersFileHandler(metaclass=Singleton):
         with open(TriggersFileHandler.triggers_file_path, mode='r') as f:
             self._triggers = json.loads(f.read())
 
+        self._build_index()
+
+    def _build_index(self) -> None:
+        """
+        Compiles the enabled triggers into the index and the automaton match() looks messages up in.
+        Must run after every change to the triggers
+        :return: None
+        """
+
+        index = {}
+        patterns = {}
+        for key, trigger in self._triggers.items():
+            if not trigger['enabled']:
+                continue
+
+            replies = trigger['reply']
+            compiled = CompiledTrigger(
+                key=key,
+                owners=frozenset(trigger['owner']),
+                replies=(replies,) if isinstance(replies, str) else tuple(replies),
+                match=trigger.get('match', MATCH_EXACT)
+            )
+
+            if compiled['match'] in (MATCH_CONTAINS, MATCH_WORD):
+                patterns[key.upper()] = compiled
+            else:
+                index[key.upper()] = compiled
+
+        self._index = index
+        self._key_lengths = frozenset(len(key) for key in index)
+        self._automaton = AhoCorasick(patterns) if patterns else None
+
     def save_triggers(self) -> None:
         """
         Writes the in-memory triggers to the triggers.json file
@@ -98,21 +146,56 @@ class TriggersFileHandler(metaclass=Singleton):
 
         return self._triggers[trigger_name]['enabled']
 
-    async def handle_trigger(self, event: hikari.GuildMessageCreateEvent, config: Config) -> None:
-        content = event.message.content.upper()
+    async def handle_trigger(self, event: hikari.GuildMessageCreateEvent, trigger: CompiledTrigger,
+                             config: Config) -> None:
+        """
+        Replies to a message that matched a trigger, if its author may use the trigger
 
-        trigger: TriggerInfo = self._triggers[content]
+        :param event: The message's event
+        :param trigger: The trigger the message matched
+        :param config: The config
+        :return: None
+        """
 
-        if event.message.author.id not in trigger['owner'] or not trigger['enabled']:
+        if event.message.author.id not in trigger['owners']:
             return
 
-        roles = event.get_member().role_ids
-        if not (config['triggers']['booster_role_id'] in roles or config['triggers']['trigger_role_id'] in roles or
-                config['mod_role_id'] in roles):
+        allowed_roles = {config['triggers']['booster_role_id'], config['triggers']['trigger_role_id'],
+                         config['mod_role_id']}
+        if allowed_roles.isdisjoint(event.get_member().role_ids):
             return
 
-        reply = trigger['reply'] if type(trigger['reply']) is str else choice(trigger['reply'])
-        await event.message.respond(reply)
+        await event.message.respond(choice(trigger['replies']))
+
+    def match(self, msg: str) -> CompiledTrigger | None:
+        """
+        Looks a message up in the trigger index, then scans it for contains and word triggers.
+        Without contains and word triggers, ASCII messages whose length no trigger has are
+        rejected before being uppercased, uppercasing only keeps the length of ASCII text
+
+        :param msg: The message's content
+        :return: The enabled trigger the message matches, if any. Exact triggers win,
+        then the contains or word trigger that ends first in the message
+        """
+
+        if self._automaton is None and len(msg) not in self._key_lengths and msg.isascii():
+            return None
+
+        content = msg.upper()
+
+        if (trigger := self._index.get(content)) is not None or self._automaton is None:
+            return trigger
+
+        for start, end, trigger in self._automaton.find(content):
+            if trigger['match'] == MATCH_CONTAINS or (not _is_word_char(content, start - 1) and
+                                                      not _is_word_char(content, end)):
+                return trigger
+
+        return None
 
     def is_trigger(self, msg: str) -> bool:
-        return msg.upper() in self._triggers.keys()
+        return self.match(msg) is not None
+
+
+def _is_word_char(text: str, index: int) -> bool:
+    return 0 <= index < len(text) and (text[index].isalnum() or text[index] == '_')